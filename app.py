@@ -1,10 +1,17 @@
 # modulos externos
-from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse
 
 # modulos internos
-from config.db import get_db
+from config.db import meta, engine, DB_CREATE_ALL
+from middlewares.rate_limit_middleware import RateLimitMiddleware, RATE_LIMIT_ENABLED
+from middlewares.loader_middleware import DataLoaderMiddleware
+from middlewares.access_log_middleware import AccessLogMiddleware
+from config.log import start_access_log, stop_access_log
+from services.health_services import check_database, readiness
+from services.worker_services import start_workers, stop_workers
 from routes import auth_routes
 from routes import user_routes
 from routes import category_routes
@@ -12,8 +19,30 @@ from routes import item_routes
 from routes import auction_routes
 from routes import payment_routes
 from routes import bid_routes
+from routes import me_routes
+from routes import stats_routes
+from routes import debug_routes
+# Registra los workers de archivado y de precarga; el resto se registran al importar sus rutas
+import services.archive_services
+import services.prefetch_services
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_CREATE_ALL:
+        meta.create_all(engine)
+    start_access_log()
+    start_workers()
+    yield
+    stop_workers()
+    stop_access_log()
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(DataLoaderMiddleware)
+
+# Se registra antes que CORS para que las respuestas 429 tambien lleven sus cabeceras
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,6 +52,9 @@ app.add_middleware(
     allow_headers=["*"],  # Permite todos los encabezados
 )
 
+# La ultima en registrarse es la mas externa: mide tambien los 429 y las respuestas de CORS
+app.add_middleware(AccessLogMiddleware)
+
 app.include_router(auth_routes.router, prefix="/auth")
 app.include_router(user_routes.router, prefix="/admin/users")
 app.include_router(category_routes.router, prefix="/admin/categories")
@@ -30,15 +62,30 @@ app.include_router(item_routes.router, prefix="/items")
 app.include_router(auction_routes.router, prefix="/auctions")
 app.include_router(payment_routes.router, prefix="/payments")
 app.include_router(bid_routes.router, prefix="/bids")
+app.include_router(me_routes.router, prefix="/me")
+app.include_router(stats_routes.router, prefix="/admin/stats")
+app.include_router(debug_routes.router, prefix="/admin/debug")
 
 @app.get("/")
 def read_root():
     return {"message": "Bienvenido a la API de subastas"}
 
 @app.get("/healthcheck")
-def healthcheck(db: Session = Depends(get_db)):
-    try:
-        db.execute("SELECT 1")
+def healthcheck():
+    if check_database()["ready"]:
         return {"status": "healthy"}
-    except Exception:
-        return {"status": "unhealthy"}
\ No newline at end of file
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "unhealthy"})
+
+# Liveness: solo confirma que el proceso responde, nunca toca la base de datos
+@app.get("/livez")
+def livez():
+    return {"status": "alive"}
+
+# Readiness: el balanceador deja de enviar trafico a workers con el pool saturado
+@app.get("/readyz")
+def readyz():
+    ready, report = readiness()
+    content = {"status": "ready" if ready else "not ready", "checks": report}
+    if not ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=content)
+    return content
\ No newline at end of file
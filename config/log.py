@@ -0,0 +1,51 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+ACCESS_LOG_ENABLED = os.getenv("ACCESS_LOG_ENABLED", "true").lower() == "true"
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", "10000"))
+
+access_logger = logging.getLogger("colexpert.access")
+access_logger.propagate = False
+
+class JsonFormatter(logging.Formatter):
+    # El mensaje ya es un dict: se serializa tal cual, una linea por peticion
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, default=str, separators=(",", ":"))
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    # Si el hilo escritor no da abasto se descartan lineas en lugar de bloquear la peticion
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # El formateo (json.dumps) lo hace el hilo del QueueListener, no el de la peticion
+        return record
+
+_listener = None
+
+def start_access_log() -> None:
+    global _listener
+    if not ACCESS_LOG_ENABLED or _listener is not None:
+        return
+    log_queue = queue.Queue(ACCESS_LOG_QUEUE_SIZE)
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+    access_logger.addHandler(DroppingQueueHandler(log_queue))
+    access_logger.setLevel(logging.INFO)
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+
+def stop_access_log() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        for handler in list(access_logger.handlers):
+            access_logger.removeHandler(handler)
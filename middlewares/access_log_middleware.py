@@ -0,0 +1,119 @@
+# modulos externos
+import os
+import random
+import time
+import uuid
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# modulos internos
+from config.log import access_logger, ACCESS_LOG_ENABLED
+
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1"))
+ACCESS_LOG_SLOW_MS = float(os.getenv("ACCESS_LOG_SLOW_MS", "500"))
+ACCESS_LOG_MAX_STATEMENTS = int(os.getenv("ACCESS_LOG_MAX_STATEMENTS", "50"))
+
+# Muestreo por ruta: "POST /bids/=0.05,GET /items/=0.2" (metodo + plantilla de la ruta)
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    rates = {}
+    for entry in spec.split(","):
+        if "=" in entry:
+            route, rate = entry.rsplit("=", 1)
+            rates[route.strip()] = float(rate)
+    return rates
+
+ACCESS_LOG_SAMPLE_RATES = parse_sample_rates(os.getenv("ACCESS_LOG_SAMPLE_RATES", "POST /bids/=0.1"))
+
+class RequestStats:
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.statements = []
+
+current_request: ContextVar[RequestStats] = ContextVar("current_request", default=None)
+
+# Eventos sobre la clase Engine: cubren el primario y las replicas
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    if stats is None or not conn.info.get("query_start"):
+        return
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats.sql_count += 1
+    stats.sql_seconds += elapsed
+    # Solo el texto (sin parametros): puede contener datos de usuario
+    if len(stats.statements) < ACCESS_LOG_MAX_STATEMENTS:
+        stats.statements.append((statement, elapsed))
+
+def _header(scope, name: bytes) -> str:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+class AccessLogMiddleware:
+    # Una linea JSON por peticion con el desglose de tiempos (total, SQL, resto de la app). Las
+    # peticiones lentas (ACCESS_LOG_SLOW_MS) y los errores 5xx se registran siempre, con sus sentencias
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ACCESS_LOG_ENABLED:
+            return await self.app(scope, receive, send)
+
+        # nginx envia su $request_id; sin proxy delante se genera uno
+        request_id = _header(scope, b"x-request-id") or uuid.uuid4().hex
+        stats = RequestStats(request_id)
+        token = current_request.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            current_request.reset(token)
+            self._log(scope, stats, status_code, time.perf_counter() - start)
+
+    def _log(self, scope, stats: RequestStats, status_code: int, elapsed: float) -> None:
+        route = scope.get("route")
+        route_path = getattr(route, "path", None) or scope["path"]
+        duration_ms = elapsed * 1000
+        slow = duration_ms >= ACCESS_LOG_SLOW_MS
+        rate = ACCESS_LOG_SAMPLE_RATES.get(f"{scope['method']} {route_path}", ACCESS_LOG_SAMPLE_RATE)
+        if not slow and status_code < 500 and random.random() >= rate:
+            return
+
+        entry = {
+            "ts": time.time(),
+            "request_id": stats.request_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route_path,
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "sql_count": stats.sql_count,
+            "sql_ms": round(stats.sql_seconds * 1000, 2),
+            "app_ms": round(duration_ms - stats.sql_seconds * 1000, 2),
+            "client": _header(scope, b"x-real-ip") or (scope["client"][0] if scope.get("client") else None),
+            "sample_rate": rate
+        }
+        if slow or status_code >= 500:
+            entry["slow"] = slow
+            entry["sql"] = [{"statement": statement, "ms": round(seconds * 1000, 2)} for statement, seconds in stats.statements]
+        access_logger.info(entry)
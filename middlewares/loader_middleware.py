@@ -0,0 +1,18 @@
+# modulos internos
+from services.loader_services import NameLoader, current_loader
+
+class DataLoaderMiddleware:
+    # Un NameLoader por peticion; los endpoints sincronos se ejecutan en el threadpool con una
+    # copia del contexto, asi que comparten la misma instancia
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        token = current_loader.set(NameLoader())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_loader.reset(token)
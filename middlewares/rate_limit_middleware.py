@@ -0,0 +1,199 @@
+# modulos externos
+import base64
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import anyio
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Sin URL propia se comparte el Redis de coordinacion, si lo hay, para que los limites valgan para todos los workers
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", os.getenv("COORDINATION_REDIS_URL"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+def parse_limit(spec: str) -> tuple[float, float]:
+    # "10/60" -> 10 peticiones cada 60 segundos: (tokens por segundo, capacidad del bucket)
+    count, seconds = spec.split("/")
+    return float(count) / float(seconds), float(count)
+
+class RateLimitRule:
+    def __init__(self, method: str, path: str, key: str, limit: str):
+        self.method = method
+        self.path = path.rstrip("/")
+        self.key = key
+        self.rate, self.burst = parse_limit(limit)
+        self.name = f"{method}:{self.path}:{key}"
+
+# Claves posibles: "ip" (cliente), "user" (sub del token) y "auction" (auction_id del cuerpo)
+DEFAULT_RULES = [
+    RateLimitRule("POST", "/auth/login", "ip", os.getenv("RATE_LIMIT_LOGIN_IP", "10/60")),
+    RateLimitRule("POST", "/bids/", "ip", os.getenv("RATE_LIMIT_BIDS_IP", "20/1")),
+    RateLimitRule("POST", "/bids/", "user", os.getenv("RATE_LIMIT_BIDS_USER", "5/1")),
+    RateLimitRule("POST", "/bids/", "auction", os.getenv("RATE_LIMIT_BIDS_AUCTION", "200/1")),
+]
+
+class MemoryBucketStore:
+    # Buckets del proceso actual; con varios workers cada uno aplica su propio limite
+    blocking = False
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float) -> float:
+        # Devuelve 0 si la peticion pasa, o los segundos que faltan para tener un token
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+class RedisBucketStore:
+    # Buckets compartidos entre workers; requiere el paquete `redis`
+    blocking = True
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local data = redis.call('HMGET', KEYS[1], 't', 'u')
+    local tokens = tonumber(data[1]) or burst
+    local updated = tonumber(data[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    local wait = 0
+    if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+    redis.call('HSET', KEYS[1], 't', tokens, 'u', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, url: str):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def take(self, key: str, rate: float, burst: float) -> float:
+        return float(self._script(keys=[f"ratelimit:{key}"], args=[rate, burst, time.time()]))
+
+def create_store():
+    if RATE_LIMIT_REDIS_URL:
+        return RedisBucketStore(RATE_LIMIT_REDIS_URL)
+    # Los cubos en memoria son de cada proceso: con N workers cada cliente tiene N veces el limite
+    if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        logger.warning("Rate limits are per worker without RATE_LIMIT_REDIS_URL or COORDINATION_REDIS_URL")
+    return MemoryBucketStore()
+
+def _header(scope, name: bytes) -> str:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+def _client_ip(scope) -> str:
+    ip = _header(scope, b"x-real-ip")
+    if ip:
+        return ip
+    return scope["client"][0] if scope.get("client") else None
+
+def _token_subject(scope) -> str:
+    # Solo se lee el payload del JWT (sin verificar la firma): basta para agrupar peticiones
+    authorization = _header(scope, b"authorization")
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = authorization[7:].split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload)).get("sub")
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+def _auction_id(body: bytes) -> str:
+    try:
+        auction_id = json.loads(body).get("auction_id")
+    except (ValueError, AttributeError):
+        return None
+    return str(auction_id) if auction_id is not None else None
+
+class RateLimitMiddleware:
+    def __init__(self, app, rules: list = None, store = None):
+        self.app = app
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.store = store or create_store()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path = scope["path"].rstrip("/")
+        rules = [rule for rule in self.rules if rule.method == scope["method"] and rule.path == path]
+        if not rules:
+            return await self.app(scope, receive, send)
+
+        body = None
+        if any(rule.key == "auction" for rule in rules):
+            body, receive = await self._buffer_body(receive)
+
+        for rule in rules:
+            if rule.key == "ip":
+                key = _client_ip(scope)
+            elif rule.key == "user":
+                key = _token_subject(scope)
+            else:
+                key = _auction_id(body)
+            if key is None:
+                continue
+
+            if self.store.blocking:
+                wait = await anyio.to_thread.run_sync(self.store.take, f"{rule.name}:{key}", rule.rate, rule.burst)
+            else:
+                wait = self.store.take(f"{rule.name}:{key}", rule.rate, rule.burst)
+            if wait > 0:
+                return await self._reject(send, wait)
+
+        await self.app(scope, receive, send)
+
+    async def _buffer_body(self, receive):
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        sent = False
+        async def replay():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+        return body, replay
+
+    async def _reject(self, send, wait: float):
+        content = json.dumps({"detail": "Too many requests"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(content)).encode()),
+                (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+            ]
+        })
+        await send({"type": "http.response.body", "body": content})
@@ -0,0 +1,12 @@
+-- Columnas de dinero exactas (antes FLOAT) e indice para la puja mas alta por subasta
+ALTER TABLE items
+    MODIFY init_price DECIMAL(12, 2) NOT NULL,
+    MODIFY final_price DECIMAL(12, 2) NULL;
+
+ALTER TABLE bids
+    MODIFY amount DECIMAL(12, 2) NOT NULL;
+
+ALTER TABLE payments
+    MODIFY amount DECIMAL(12, 2) NOT NULL;
+
+CREATE INDEX ix_bids_auction_amount ON bids (auction_id, amount);
@@ -0,0 +1,3 @@
+-- Indices FULLTEXT para GET /items/search y GET /auctions/search
+CREATE FULLTEXT INDEX ft_items_name_description ON items (name, description);
+CREATE FULLTEXT INDEX ft_auctions_name_description ON auctions (name, description);
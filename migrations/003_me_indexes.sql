@@ -0,0 +1,3 @@
+-- Indices para /me/bids y /me/payments (items.user_id ya tiene el indice de su clave foranea)
+CREATE INDEX ix_bids_user_auction ON bids (user_id, auction_id);
+CREATE INDEX ix_payments_user_date ON payments (user_id, date);
@@ -0,0 +1,18 @@
+-- Rellena stats_hourly con el historico existente (ejecutar una vez, con la API parada)
+INSERT INTO stats_hourly (hour, category_id, bids_count, bids_amount)
+SELECT DATE_FORMAT(b.date, '%Y-%m-%d %H:00:00'), i.category_id, COUNT(*), SUM(b.amount)
+FROM bids b
+JOIN auctions a ON a.id = b.auction_id
+JOIN items i ON i.id = a.item_id
+GROUP BY 1, 2
+ON DUPLICATE KEY UPDATE bids_count = bids_count + VALUES(bids_count), bids_amount = bids_amount + VALUES(bids_amount);
+
+INSERT INTO stats_hourly (hour, category_id, payments_created, payments_paid, revenue)
+SELECT DATE_FORMAT(p.date, '%Y-%m-%d %H:00:00'), i.category_id, COUNT(*),
+       SUM(p.state = 'PAID'), SUM(CASE WHEN p.state = 'PAID' THEN p.amount ELSE 0 END)
+FROM payments p
+JOIN items i ON i.id = p.item_id
+GROUP BY 1, 2
+ON DUPLICATE KEY UPDATE payments_created = payments_created + VALUES(payments_created),
+                        payments_paid = payments_paid + VALUES(payments_paid),
+                        revenue = revenue + VALUES(revenue);
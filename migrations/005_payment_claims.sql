@@ -0,0 +1,3 @@
+-- Reclamo de pagos por el worker de liquidacion: PROCESSING + claimed_at mientras se llama a la pasarela
+ALTER TABLE payments ADD COLUMN claimed_at DATETIME NULL;
+CREATE INDEX ix_payments_state_claimed ON payments (state, claimed_at);
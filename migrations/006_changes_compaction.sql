@@ -0,0 +1,6 @@
+-- Compactacion del registro de cambios: borrado por antiguedad y version compactada
+CREATE INDEX ix_changes_changed_at ON changes (changed_at);
+CREATE TABLE change_horizon (
+    id INT NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL
+);
@@ -0,0 +1,2 @@
+-- Los procesos ya no se reparten las subastas: la tabla de latidos deja de usarse
+DROP TABLE IF EXISTS coordination_members;
@@ -0,0 +1,2 @@
+-- Reclamo de eventos por el relay del outbox: la entrega ocurre fuera de la transaccion del reclamo
+ALTER TABLE outbox_events ADD COLUMN claimed_at DATETIME NULL;
@@ -0,0 +1,2 @@
+-- Recuento de los cambios recientes de cada entidad (ETag de los listados sincronizables)
+CREATE INDEX ix_changes_entity_changed ON changes (entity, changed_at);
@@ -0,0 +1,27 @@
+from sqlalchemy import DateTime, Table, Column, Index
+from sqlalchemy.sql.sqltypes import Integer, String, Numeric
+from config.db import meta
+
+# Pujas y pagos de subastas finalizadas hace mas de ARCHIVE_RETENTION_DAYS. Sin claves
+# foraneas: el historico no debe impedir borrar subastas, articulos o usuarios
+bids_archive = Table('bids_archive', meta,
+                     Column("id", Integer, primary_key=True, autoincrement=False),
+                     Column("amount", Numeric(12, 2), nullable=False),
+                     Column("date", DateTime(timezone=True), nullable=False),
+                     Column("auction_id", Integer, nullable=False),
+                     Column("user_id", Integer, nullable=False),
+                     Column("archived_at", DateTime(timezone=True), nullable=False),
+                     Index("ix_bids_archive_auction", "auction_id"),
+                     Index("ix_bids_archive_user", "user_id"))
+
+payments_archive = Table('payments_archive', meta,
+                         Column("id", Integer, primary_key=True, autoincrement=False),
+                         Column("amount", Numeric(12, 2), nullable=False),
+                         Column("method", String(255), nullable=False),
+                         Column("date", DateTime(timezone=True), nullable=False),
+                         Column("state", String(255), nullable=False),
+                         Column("item_id", Integer, nullable=False),
+                         Column("user_id", Integer, nullable=False),
+                         Column("archived_at", DateTime(timezone=True), nullable=False),
+                         Index("ix_payments_archive_item", "item_id"),
+                         Index("ix_payments_archive_user", "user_id"))
@@ -1,6 +1,6 @@
-from sqlalchemy import DateTime, Table, Column, ForeignKey
+from sqlalchemy import DateTime, Table, Column, ForeignKey, Index
 from sqlalchemy.sql.sqltypes import Integer, String
-from config.db import meta, engine
+from config.db import meta
 
 auctions = Table('auctions', meta,
                  Column("id", Integer, primary_key=True, index=True, autoincrement=True),
@@ -10,6 +10,5 @@ auctions = Table('auctions', meta,
                  Column("end_date", DateTime(timezone=True), nullable=True),
                  Column("type", String(255), nullable=True),
                  Column("state", String(255), nullable=True),
-                 Column("item_id", Integer, ForeignKey("items.id"), nullable=False))
-
-meta.create_all(engine)
\ No newline at end of file
+                 Column("item_id", Integer, ForeignKey("items.id"), nullable=False),
+                 Index("ft_auctions_name_description", "name", "description", mysql_prefix="FULLTEXT"))
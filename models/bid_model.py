@@ -1,12 +1,12 @@
-from sqlalchemy import DateTime, Table, Column, ForeignKey
-from sqlalchemy.sql.sqltypes import Integer, String, Float
-from config.db import meta, engine
+from sqlalchemy import DateTime, Table, Column, ForeignKey, Index
+from sqlalchemy.sql.sqltypes import Integer, String, Numeric
+from config.db import meta
 
 bids = Table('bids', meta,
              Column("id", Integer, primary_key=True, index=True, autoincrement=True),
-             Column("amount", Float, nullable=False),
+             Column("amount", Numeric(12, 2), nullable=False),
              Column("date", DateTime(timezone=True), nullable=False),
              Column("auction_id", Integer, ForeignKey("auctions.id"), nullable=False),
-             Column("user_id", Integer, ForeignKey("users.id"), nullable=False))
-
-meta.create_all(engine)
\ No newline at end of file
+             Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+             Index("ix_bids_auction_amount", "auction_id", "amount"),
+             Index("ix_bids_user_auction", "user_id", "auction_id"))
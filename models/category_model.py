@@ -1,9 +1,7 @@
 from sqlalchemy import Table, Column
 from sqlalchemy.sql.sqltypes import Integer, String
-from config.db import meta, engine
+from config.db import meta
 
 categories = Table('categories', meta,
                    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
                    Column("name", String(255), unique=True, nullable=False))
-
-meta.create_all(engine)
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import DateTime, Table, Column, Index
+from sqlalchemy.sql.sqltypes import Integer, BigInteger, String
+
+from config.db import meta
+
+# Registro de cambios para la sincronizacion incremental: la version es el id autoincremental
+# y las eliminaciones quedan como marcas (op = "delete")
+changes = Table('changes', meta,
+                Column("version", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+                Column("entity", String(50), nullable=False),
+                Column("entity_id", Integer, nullable=False),
+                Column("op", String(10), nullable=False),
+                Column("changed_at", DateTime(timezone=True), nullable=False),
+                Index("ix_changes_entity_version", "entity", "version"),
+                Index("ix_changes_changed_at", "changed_at"),
+                Index("ix_changes_entity_changed", "entity", "changed_at"))
+
+# Version hasta la que se compacto el registro (una sola fila, id = 1): un "since" anterior ya
+# no puede responderse con cambios incrementales
+change_horizon = Table('change_horizon', meta,
+                       Column("id", Integer, primary_key=True, autoincrement=False),
+                       Column("version", BigInteger().with_variant(Integer, "sqlite"), nullable=False))
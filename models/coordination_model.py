@@ -0,0 +1,19 @@
+from sqlalchemy import DateTime, Table, Column, Index
+from sqlalchemy.sql.sqltypes import Integer, BigInteger, String, Text
+from config.db import meta
+
+# Mensajes difundidos a todos los procesos (invalidaciones de cache, avisos); se purgan a los pocos segundos
+coordination_messages = Table('coordination_messages', meta,
+                              Column("id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+                              Column("channel", String(100), nullable=False),
+                              Column("payload", Text, nullable=False),
+                              Column("origin", String(100), nullable=False),
+                              Column("created_at", DateTime, nullable=False),
+                              Index("ix_coordination_messages_created", "created_at"))
+
+# Valores compartidos con caducidad (tickets de pujas, respuestas idempotentes)
+coordination_values = Table('coordination_values', meta,
+                            Column("key", String(255), primary_key=True),
+                            Column("value", Text(length=16777215), nullable=False),
+                            Column("expires_at", DateTime, nullable=False),
+                            Index("ix_coordination_values_expires", "expires_at"))
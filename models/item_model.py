@@ -1,7 +1,7 @@
-from sqlalchemy import DateTime, Table, Column, ForeignKey
-from sqlalchemy.sql.sqltypes import Integer, String, Float, Text
+from sqlalchemy import DateTime, Table, Column, ForeignKey, Index
+from sqlalchemy.sql.sqltypes import Integer, String, Numeric, Text
 from sqlalchemy.sql import func
-from config.db import meta, engine
+from config.db import meta
 
 items = Table('items', meta,
               Column("id", Integer, primary_key=True, index=True, autoincrement=True),
@@ -9,9 +9,8 @@ items = Table('items', meta,
               Column("description", String(255), nullable=False),
               Column("img", Text(length=4294967295), nullable=True),
               Column("created_at", DateTime(timezone=True), server_default=func.now()),
-              Column("init_price", Float, nullable=False),
-              Column("final_price", Float, nullable=True),
+              Column("init_price", Numeric(12, 2), nullable=False),
+              Column("final_price", Numeric(12, 2), nullable=True),
               Column("category_id", Integer, ForeignKey("categories.id"), nullable=False),
-              Column("user_id", Integer, ForeignKey("users.id"), nullable=True))
-
-meta.create_all(engine)
\ No newline at end of file
+              Column("user_id", Integer, ForeignKey("users.id"), nullable=True),
+              Index("ft_items_name_description", "name", "description", mysql_prefix="FULLTEXT"))
@@ -0,0 +1,11 @@
+from sqlalchemy import DateTime, Table, Column, ForeignKey
+from sqlalchemy.sql.sqltypes import Integer, String, LargeBinary
+from sqlalchemy.sql import func
+from config.db import meta
+
+item_thumbnails = Table('item_thumbnails', meta,
+                        Column("item_id", Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True),
+                        Column("size", String(20), primary_key=True),
+                        Column("content_type", String(50), nullable=False),
+                        Column("data", LargeBinary(length=16777215), nullable=False),
+                        Column("created_at", DateTime(timezone=True), server_default=func.now()))
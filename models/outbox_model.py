@@ -0,0 +1,15 @@
+from sqlalchemy import DateTime, Table, Column, Index
+from sqlalchemy.sql.sqltypes import Integer, BigInteger, String, Text
+from sqlalchemy.sql import func
+from config.db import meta
+
+outbox_events = Table('outbox_events', meta,
+                      Column("id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+                      Column("event_type", String(100), nullable=False),
+                      Column("aggregate_id", Integer, nullable=False),
+                      Column("payload", Text, nullable=False),
+                      Column("created_at", DateTime(timezone=True), server_default=func.now()),
+                      Column("dispatched_at", DateTime(timezone=True), nullable=True),
+                      Column("attempts", Integer, nullable=False, server_default="0"),
+                      Column("claimed_at", DateTime, nullable=True),
+                      Index("ix_outbox_pending", "dispatched_at", "id"))
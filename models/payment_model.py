@@ -1,14 +1,14 @@
-from sqlalchemy import DateTime, Table, Column, ForeignKey
-from sqlalchemy.sql.sqltypes import Integer, String, Float
-from config.db import meta, engine
+from sqlalchemy import DateTime, Table, Column, ForeignKey, Index
+from sqlalchemy.sql.sqltypes import Integer, String, Numeric
+from config.db import meta
 
 payments = Table('payments', meta,
                  Column("id", Integer, primary_key=True, index=True, autoincrement=True),
-                 Column("amount", Float, nullable=False),
+                 Column("amount", Numeric(12, 2), nullable=False),
                  Column("method", String(255), nullable=False), 
                  Column("date", DateTime(timezone=True), nullable=False),
                  Column("state", String(255), nullable=False),
                  Column("item_id", Integer, ForeignKey("items.id"), nullable=False),
-                 Column("user_id", Integer, ForeignKey("users.id"), nullable=False))
-
-meta.create_all(engine)
\ No newline at end of file
+                 Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+                 Column("claimed_at", DateTime, nullable=True),
+                 Index("ix_payments_user_date", "user_id", "date"))
@@ -0,0 +1,15 @@
+from sqlalchemy import DateTime, Table, Column
+from sqlalchemy.sql.sqltypes import Integer, Numeric
+from config.db import meta
+
+# Agregados por hora y categoria: los pagos y subastas en su misma transaccion, las pujas
+# desde el outbox (evento bid.created)
+stats_hourly = Table('stats_hourly', meta,
+                     Column("hour", DateTime, primary_key=True),
+                     Column("category_id", Integer, primary_key=True),
+                     Column("bids_count", Integer, nullable=False, server_default="0"),
+                     Column("bids_amount", Numeric(14, 2), nullable=False, server_default="0"),
+                     Column("auctions_finished", Integer, nullable=False, server_default="0"),
+                     Column("payments_created", Integer, nullable=False, server_default="0"),
+                     Column("payments_paid", Integer, nullable=False, server_default="0"),
+                     Column("revenue", Numeric(14, 2), nullable=False, server_default="0"))
@@ -1,7 +1,7 @@
 from sqlalchemy import DateTime, Table, Column
 from sqlalchemy.sql.sqltypes import Integer, String, Text
 from sqlalchemy.sql import func
-from config.db import meta, engine
+from config.db import meta
 
 users = Table('users', meta, 
               Column("id", Integer, primary_key=True, index=True, autoincrement=True),
@@ -13,5 +13,3 @@ users = Table('users', meta,
               Column("phone", String(15), nullable=True),
               Column("created_at", DateTime(timezone=True), server_default=func.now()),
               Column("img", Text(length=4294967295), nullable=True))
-
-meta.create_all(engine)
\ No newline at end of file
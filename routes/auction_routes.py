@@ -1,32 +1,48 @@
 # modulos externos
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Request
+from typing import Optional
 from fastapi.security import OAuth2PasswordBearer
 
 # modulos internos
 from schemas.auction_schemas import AuctionResponse, AuctionRequest, AuctionUpdate
 from schemas.auth_schemas import Token
 
-from services.auction_services import get_all_auctions, create_auction, get_auction_by_id, update_auction, delete_auction_by_id
+from services.auction_services import get_all_auctions, create_auction, get_auction_by_id, update_auction, delete_auction_by_id, search_auctions
+from services.bid_services import get_top_bids, TOP_BIDS_SIZE
+from services.idempotency_services import run_idempotent
+from services.sync_services import sync_list
+from services.msgpack_services import render
 
 router = APIRouter()    
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# ETag / If-Modified-Since devuelven 304 si nada cambio; ?since=<version> devuelve solo el delta
 @router.get("/")
-def get_auctions(token: Token = Depends(oauth2_scheme)):
-    return get_all_auctions(token)
+def get_auctions(request: Request, since: Optional[int] = Query(None, ge=0), token: Token = Depends(oauth2_scheme)):
+    return sync_list("auctions", request, since, token, get_all_auctions)
 
+@router.get("/search")
+def search(request: Request, q: str = Query(min_length=1, max_length=255), limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0), token: Token = Depends(oauth2_scheme)):
+    return render(request, search_auctions(q, limit, offset, token))
+
+# Las lecturas responden en MessagePack con "Accept: application/msgpack"
 @router.get("/{id}")
-def get_auction(id: int, token: Token = Depends(oauth2_scheme)):
-    return get_auction_by_id(id, token)
+def get_auction(request: Request, id: int, token: Token = Depends(oauth2_scheme)):
+    return render(request, get_auction_by_id(id, token))
+
+@router.get("/{id}/top-bids")
+def top_bids(request: Request, id: int, limit: int = Query(TOP_BIDS_SIZE, ge=1, le=TOP_BIDS_SIZE), token: Token = Depends(oauth2_scheme)):
+    return render(request, get_top_bids(id, limit, token))
 
 @router.post("/")
 def post_auction(auction: AuctionRequest, token: Token = Depends(oauth2_scheme)):
     return create_auction(auction, token)
 
 @router.put("/{id}")
-def put_auction(id: int, auction: AuctionUpdate, token: Token = Depends(oauth2_scheme)):
-    return update_auction(id, auction, token)
+@router.patch("/{id}")
+def put_auction(id: int, auction: AuctionUpdate, token: Token = Depends(oauth2_scheme), idempotency_key: Optional[str] = Header(None, max_length=255)):
+    return run_idempotent(idempotency_key, f"PUT /auctions/{id}", token, auction, lambda: update_auction(id, auction, token))
 
 @router.delete("/{id}")
 def delete_auction(id: int, token: Token = Depends(oauth2_scheme)):
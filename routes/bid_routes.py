@@ -1,30 +1,59 @@
 # modulos externos
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+from typing import Optional
 from fastapi.security import OAuth2PasswordBearer
 
 # modelos internos
-from schemas.bid_schemas import BidResponse, BidRequest, BidUpdate
+from schemas.bid_schemas import BidResponse, BidRequest, BidUpdate, BidTicket
 from schemas.auth_schemas import Token
 
 from services.bid_services import get_all_bids, get_bid_by_id, create_bid, update_bid, delete_bid_by_id
+from services.idempotency_services import run_idempotent
+from services.sync_services import sync_list
+from services.bid_queue_services import enqueue_bid, get_ticket, BID_QUEUE_ENABLED
+from services.coordination_services import sticky_headers
+from services.msgpack_services import render, render_stored
 
 router = APIRouter()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Las lecturas y las pujas responden en MessagePack con "Accept: application/msgpack"
 @router.get("/")
-def get_bids(token: Token = Depends(oauth2_scheme)):
-    return get_all_bids(token)
+def get_bids(request: Request, archived: bool = False, since: Optional[int] = Query(None, ge=0), token: Token = Depends(oauth2_scheme)):
+    # El historico archivado no forma parte de la sincronizacion
+    if archived:
+        return render(request, get_all_bids(token, archived))
+    return sync_list("bids", request, since, token, lambda token, ids: get_all_bids(token, ids=ids))
+
+@router.get("/tickets/{ticket_id}")
+async def get_bid_ticket(request: Request, ticket_id: str, wait: float = Query(0, ge=0, le=30), token: Token = Depends(oauth2_scheme)):
+    return render(request, await get_ticket(ticket_id, token, wait))
 
 @router.get("/{id}")
-def get_bid(id: int, token: Token = Depends(oauth2_scheme)):
-    return get_bid_by_id(id, token)
+def get_bid(request: Request, id: int, archived: bool = False, token: Token = Depends(oauth2_scheme)):
+    return render(request, get_bid_by_id(id, token, archived))
 
+# En modo cola (BID_QUEUE_ENABLED o "Prefer: respond-async") se responde 202 con un ticket
 @router.post("/")
-def post_bid(bid: BidRequest, token: Token = Depends(oauth2_scheme)):
-    return create_bid(bid, token)
+def post_bid(request: Request, bid: BidRequest, token: Token = Depends(oauth2_scheme), idempotency_key: Optional[str] = Header(None, max_length=255), prefer: Optional[str] = Header(None)):
+    if BID_QUEUE_ENABLED or (prefer and "respond-async" in prefer):
+        model, status_code = BidTicket, status.HTTP_202_ACCEPTED
+        result = run_idempotent(idempotency_key, "POST /bids/", token, bid, lambda: enqueue_bid(bid, token), status_code)
+    else:
+        model, status_code = BidResponse, status.HTTP_200_OK
+        result = run_idempotent(idempotency_key, "POST /bids/", token, bid, lambda: create_bid(bid, token))
+
+    # Con Idempotency-Key la respuesta ya viene serializada en JSON
+    if isinstance(result, Response):
+        result = render_stored(request, result, model)
+    else:
+        result = render(request, result, status_code)
+    result.headers.update(sticky_headers(bid.auction_id))
+    return result
 
 @router.put("/{id}")
+@router.patch("/{id}")
 def put_bid(id: int, bid: BidUpdate, token: Token = Depends(oauth2_scheme)):
     return update_bid(id, bid, token)
 
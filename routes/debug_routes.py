@@ -0,0 +1,18 @@
+# modulos externos
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+from fastapi.security import OAuth2PasswordBearer
+
+# modulos internos
+from schemas.auth_schemas import Token
+
+from services.profiler_services import run_profile
+
+router = APIRouter()
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+
+# Perfil del proceso que atiende la peticion (con varios workers, uno cualquiera)
+@router.get("/profile", response_class=PlainTextResponse)
+def profile(seconds: float = Query(5, gt=0), idle: bool = False, token: Token = Depends(oauth2_scheme)):
+    return run_profile(seconds, idle, token)
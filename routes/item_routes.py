@@ -1,25 +1,51 @@
 # modulos externos
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from typing import Optional
+from fastapi.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordBearer
 
 # modulos internos
 from schemas.item_schemas import ItemRequest, ItemUpdate
 from schemas.auth_schemas import Token
 
-from services.item_services import get_all_items, create_item, get_item_by_id, update_item, delete_item_by_id, get_item_id_by_name
+from services.item_services import get_all_items, create_item, get_item_by_id, update_item, delete_item_by_id, get_item_id_by_name, search_items
+from services.image_services import get_item_image, get_item_thumbnail, image_url, image_response, THUMBNAIL_SIZES
+from services.sync_services import sync_list
 
 router = APIRouter()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# ETag / If-Modified-Since devuelven 304 si nada cambio; ?since=<version> devuelve solo el delta
 @router.get("/")
-def get_items(token: Token = Depends(oauth2_scheme)):
-    return get_all_items(token)
+def get_items(request: Request, since: Optional[int] = Query(None, ge=0), token: Token = Depends(oauth2_scheme)):
+    return sync_list("items", request, since, token, get_all_items)
+
+@router.get("/search")
+def search(q: str = Query(min_length=1, max_length=255), limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0), token: Token = Depends(oauth2_scheme)):
+    return search_items(q, limit, offset, token)
 
 @router.get("/{id}")
 def get_item(id: int, token: Token = Depends(oauth2_scheme)):
     return get_item_by_id(id, token)
 
+# Las imagenes exigen sesion como el resto del articulo: el cliente las pide con su cabecera
+# Authorization (no sirven en un <img src> directo). nginx lo comprueba con auth_request
+@router.get("/{id}/image")
+def get_image(request: Request, id: int, token: Token = Depends(oauth2_scheme)):
+    data, content_type = get_item_image(id, token)
+    return image_response(request, data, content_type)
+
+@router.get("/{id}/thumbnail/{size}")
+def get_thumbnail(request: Request, id: int, size: str, token: Token = Depends(oauth2_scheme)):
+    if size not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown thumbnail size")
+    thumbnail = get_item_thumbnail(id, size, token)
+    if not thumbnail:
+        # Miniatura aun no generada: se sirve el original
+        return RedirectResponse(image_url(id), status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    return image_response(request, thumbnail.data, thumbnail.content_type)
+
 @router.get("/name/{name}")
 def get_itemId(name: str):
     return get_item_id_by_name(name)
@@ -28,7 +54,9 @@ def get_itemId(name: str):
 def post_item(item: ItemRequest, token: Token = Depends(oauth2_scheme)):
     return create_item(item, token)
 
+# PUT y PATCH solo escriben los campos enviados
 @router.put("/{id}")
+@router.patch("/{id}")
 def put_item(id: int, item: ItemUpdate, token: Token = Depends(oauth2_scheme)):
     return update_item(id, item, token)
 
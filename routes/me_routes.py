@@ -0,0 +1,24 @@
+# modulos externos
+from fastapi import APIRouter, Depends
+from fastapi.security import OAuth2PasswordBearer
+
+# modulos internos
+from schemas.auth_schemas import Token
+
+from services.me_services import get_my_bids, get_my_winning_auctions, get_my_payments
+
+router = APIRouter()
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+
+@router.get("/bids")
+def my_bids(token: Token = Depends(oauth2_scheme)):
+    return get_my_bids(token)
+
+@router.get("/winning")
+def my_winning(token: Token = Depends(oauth2_scheme)):
+    return get_my_winning_auctions(token)
+
+@router.get("/payments")
+def my_payments(token: Token = Depends(oauth2_scheme)):
+    return get_my_payments(token)
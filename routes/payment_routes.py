@@ -1,5 +1,6 @@
 # modulos externos
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
+from typing import Optional
 from fastapi.security import OAuth2PasswordBearer
 
 # modulos internos
@@ -7,22 +8,23 @@ from schemas.payment_schemas import PaymentResponse, PaymentRequest, PaymentUpda
 from schemas.auth_schemas import Token
 
 from services.payment_services import get_all_payments, create_payment, get_payment_by_id, update_payment, delete_payment_by_id
+from services.idempotency_services import run_idempotent
 
 router = APIRouter()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 @router.get("/")
-def get_payments(token: Token = Depends(oauth2_scheme)):
-    return get_all_payments(token)
+def get_payments(archived: bool = False, token: Token = Depends(oauth2_scheme)):
+    return get_all_payments(token, archived)
 
 @router.get("/{id}")
-def get_payment(id: int, token: Token = Depends(oauth2_scheme)):
-    return get_payment_by_id(id, token)
+def get_payment(id: int, archived: bool = False, token: Token = Depends(oauth2_scheme)):
+    return get_payment_by_id(id, token, archived)
 
 @router.post("/")
-def post_payment(payment: PaymentRequest, token: Token = Depends(oauth2_scheme)):
-    return create_payment(payment, token)
+def post_payment(payment: PaymentRequest, token: Token = Depends(oauth2_scheme), idempotency_key: Optional[str] = Header(None, max_length=255)):
+    return run_idempotent(idempotency_key, "POST /payments/", token, payment, lambda: create_payment(payment, token))
 
 @router.put("/{id}")
 def put_payment(id: int, payment: PaymentUpdate, token: Token = Depends(oauth2_scheme)):
@@ -0,0 +1,26 @@
+# modulos externos
+from fastapi import APIRouter, Depends
+from fastapi.security import OAuth2PasswordBearer
+from typing import Optional
+from datetime import datetime
+
+# modulos internos
+from schemas.auth_schemas import Token
+
+from services.stats_services import get_revenue_by_category, get_bids_per_hour, get_conversion
+
+router = APIRouter()
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+
+@router.get("/revenue")
+def revenue(start: Optional[datetime] = None, end: Optional[datetime] = None, token: Token = Depends(oauth2_scheme)):
+    return get_revenue_by_category(start, end, token)
+
+@router.get("/bids")
+def bids_per_hour(start: Optional[datetime] = None, end: Optional[datetime] = None, token: Token = Depends(oauth2_scheme)):
+    return get_bids_per_hour(start, end, token)
+
+@router.get("/conversion")
+def conversion(start: Optional[datetime] = None, end: Optional[datetime] = None, token: Token = Depends(oauth2_scheme)):
+    return get_conversion(start, end, token)
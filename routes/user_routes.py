@@ -21,6 +21,7 @@ def post_user(user: UserRequest, token: Token = Depends(oauth2_scheme)):
     return create_admin(user, token)
 
 @router.put("/{id}")
+@router.patch("/{id}")
 def put_user(id: int, user: UserUpdate, token: Token = Depends(oauth2_scheme)):
     return update_user(id, user, token)
 
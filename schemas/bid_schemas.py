@@ -1,20 +1,38 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing_extensions import Annotated
 from typing import Optional
 from datetime import datetime
+import enum
+
+from schemas.common_schemas import Money
 
 class BidRequest(BaseModel):
-    amount: float
+    amount: Annotated[Money, Field(gt=0)]
     auction_id: int
 
 class BidResponse(BaseModel):
     id: Optional[int] = None
-    amount: float
+    amount: Money
     date: datetime
-    auction_name: str
-    user_name: str
+    auction_name: Optional[str] = None
+    user_name: Optional[str] = None
 
 class BidUpdate(BaseModel):
-    amount: Optional[float] = None
+    amount: Optional[Money] = None
     date: Optional[datetime] = None
     auction_id: Optional[int] = None
-    user_id: Optional[int] = None
\ No newline at end of file
+    user_id: Optional[int] = None
+
+class BidTicketState(str, enum.Enum):
+    queued = "QUEUED"
+    accepted = "ACCEPTED"
+    rejected = "REJECTED"
+
+class BidTicket(BaseModel):
+    id: str
+    auction_id: int
+    state: BidTicketState
+    received_at: datetime
+    bid: Optional[BidResponse] = None
+    status_code: Optional[int] = None
+    detail: Optional[str] = None
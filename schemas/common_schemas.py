@@ -0,0 +1,17 @@
+from decimal import Decimal
+from pydantic import Field, PlainSerializer
+from typing_extensions import Annotated
+
+# Importes exactos (DECIMAL(12, 2) en la base de datos); en JSON se siguen enviando como numero
+Money = Annotated[
+    Decimal,
+    Field(max_digits=12, decimal_places=2),
+    PlainSerializer(float, return_type=float, when_used="json")
+]
+
+# Sumas de importes (NUMERIC(14, 2) por hora y sumadas en la consulta): sin limite de digitos
+MoneyTotal = Annotated[
+    Decimal,
+    Field(decimal_places=2),
+    PlainSerializer(float, return_type=float, when_used="json")
+]
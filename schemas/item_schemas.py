@@ -2,11 +2,13 @@ from pydantic import BaseModel, constr
 from typing_extensions import Annotated
 from typing import Optional
 
+from schemas.common_schemas import Money
+
 class ItemRequest(BaseModel):
     name: Annotated[str, constr(max_length=255)]
     description: Annotated[str, constr(max_length=255)]
     img: Optional[str] = None
-    init_price: float
+    init_price: Money
     category_id: int
     user_id: Optional[int] = None
 
@@ -15,8 +17,10 @@ class ItemResponse(BaseModel):
     name: str
     description: str
     img: Optional[str] = None
-    init_price: float
-    final_price: float
+    thumbnail_url: Optional[str] = None
+    img_url: Optional[str] = None
+    init_price: Money
+    final_price: Money
     category_name: str
     user_name: Optional[str] = None
 
@@ -24,7 +28,7 @@ class ItemUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     img: Optional[str] = None
-    final_price: Optional[float] = None
+    final_price: Optional[Money] = None
     category_id: Optional[int] = None
     user_id: Optional[int] = None 
 
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+from schemas.common_schemas import Money, MoneyTotal
+
+class MyBidSummary(BaseModel):
+    auction_id: int
+    auction_name: str
+    auction_state: Optional[str] = None
+    end_date: Optional[datetime] = None
+    bids_count: int
+    total_amount: MoneyTotal
+    max_amount: Money
+    last_bid_date: datetime
+    winning: bool
+
+class WinningAuction(BaseModel):
+    auction_id: int
+    auction_name: str
+    state: Optional[str] = None
+    end_date: Optional[datetime] = None
+    item_id: int
+    item_name: str
+    final_price: Money
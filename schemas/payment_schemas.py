@@ -2,6 +2,16 @@ from pydantic import BaseModel, constr
 from typing_extensions import Annotated
 from typing import Optional
 from datetime import datetime
+import enum
+
+from schemas.common_schemas import Money
+
+class PaymentState(str, enum.Enum):
+    pending = "PENDING"
+    processing = "PROCESSING"
+    paid = "PAID"
+    failed = "FAILED"
+
 
 class PaymentRequest(BaseModel):
     item_id: int
@@ -9,12 +19,12 @@ class PaymentRequest(BaseModel):
 
 class PaymentResponse(BaseModel):
     id: Optional[int] = None
-    amount: float
+    amount: Money
     method: str
     date: datetime
     state: str
-    item_name: str
-    user_name: str
+    item_name: Optional[str] = None
+    user_name: Optional[str] = None
 
 class PaymentUpdate(BaseModel):
     date: Optional[datetime] = None
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+from schemas.common_schemas import MoneyTotal
+
+class CategoryRevenue(BaseModel):
+    category_id: int
+    category_name: Optional[str] = None
+    payments_paid: int
+    revenue: MoneyTotal
+
+class HourlyBids(BaseModel):
+    hour: datetime
+    bids_count: int
+    bids_amount: MoneyTotal
+
+class Conversion(BaseModel):
+    auctions_finished: int
+    payments_created: int
+    payments_paid: int
+    revenue: MoneyTotal
+    conversion_rate: float
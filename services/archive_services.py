@@ -0,0 +1,65 @@
+# modulos externos
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, literal
+
+# modulos internos
+from config.db import get_db
+from models.archive_model import bids_archive, payments_archive
+from models.auction_model import auctions
+from models.bid_model import bids
+from models.payment_model import payments
+from schemas.auction_schemas import AuctionState
+from schemas.payment_schemas import PaymentState
+from services.worker_services import BackgroundWorker, register_worker
+from services.sync_services import record_change, DELETE
+
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "true").lower() == "true"
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "3600"))
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "180"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+def archivable_auctions():
+    cutoff = datetime.now() - timedelta(days=ARCHIVE_RETENTION_DAYS)
+    return select(auctions.c.id).where(auctions.c.state == AuctionState.finished.value, auctions.c.end_date < cutoff)
+
+def move_rows(db, table, archive, condition, entity: str = None) -> int:
+    # Copia y borra un lote en la misma transaccion; FOR UPDATE SKIP LOCKED evita que dos
+    # workers archiven las mismas filas
+    ids = db.execute(
+        select(table.c.id).where(condition).order_by(table.c.id).limit(ARCHIVE_BATCH_SIZE).with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not ids:
+        return 0
+
+    # Las columnas de trabajo que el historico no guarda (payments.claimed_at) no se copian
+    columns = [column.name for column in table.c if column.name in archive.c]
+    db.execute(archive.insert().from_select(
+        columns + ["archived_at"],
+        select(*(table.c[name] for name in columns), literal(datetime.now(), archive.c.archived_at.type)).where(table.c.id.in_(ids))
+    ))
+    db.execute(table.delete().where(table.c.id.in_(ids)))
+    # Para los clientes que sincronizan el listado vivo, una fila archivada es una eliminacion
+    if entity:
+        record_change(db, entity, ids, DELETE)
+    db.commit()
+    return len(ids)
+
+def archive_bids(db) -> int:
+    return move_rows(db, bids, bids_archive, bids.c.auction_id.in_(archivable_auctions()), "bids")
+
+def archive_payments(db) -> int:
+    # Los pagos pendientes siguen en la tabla viva hasta que se liquiden
+    items_of_archivable = select(auctions.c.item_id).where(auctions.c.id.in_(archivable_auctions()))
+    return move_rows(db, payments, payments_archive, (payments.c.item_id.in_(items_of_archivable)) & (payments.c.state.in_([PaymentState.paid.value, PaymentState.failed.value])))
+
+class ArchiveWorker(BackgroundWorker):
+    name = "archive"
+    interval = ARCHIVE_INTERVAL
+
+    def run_once(self) -> int:
+        with get_db() as db:
+            return archive_bids(db) + archive_payments(db)
+
+archive_worker = register_worker(ArchiveWorker(), enabled=ARCHIVE_ENABLED)
@@ -5,15 +5,21 @@ from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timezone
 
 # modulos internos
-from config.db import get_db
+from config.db import get_db, get_read_db, mark_write
 from models.auction_model import auctions
-from models.user_model import users
-from schemas.auction_schemas import AuctionResponse, AuctionRequest, AuctionUpdate
-from schemas.payment_schemas import PaymentRequest
+from models.item_model import items
+from models.bid_model import bids
+from schemas.auction_schemas import AuctionResponse, AuctionRequest, AuctionUpdate, AuctionState
 from schemas.auth_schemas import Token
 from services.auth_services import read_access_token
-from services.item_services import get_item_by_id
-from services.payment_services import create_payment
+from services.settlement_services import SETTLEMENT_ENABLED, unpaid_winners, insert_pending_payments
+from services.outbox_services import add_event
+from services.stats_services import record_auction_finished
+from services.search_services import search_condition
+from services.sync_services import record_change, record_dependents, DELETE
+from services.loader_services import load_names
+from services.patch_services import changed_values
+from services.cache_services import cached
 
 def get_role(token: Token) -> str:
     with get_db() as db:
@@ -22,15 +28,24 @@ def get_role(token: Token) -> str:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
         return token_data.role
 
-def get_all_auctions(token: Token) -> list[AuctionResponse]:
+def naive_utc(value: datetime) -> datetime:
+    # Las fechas se guardan sin zona horaria y en UTC; una fecha sin zona ya se toma como UTC
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def get_all_auctions(token: Token, ids: list[int] = None) -> list[AuctionResponse]:
     role = get_role(token)
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
-    with get_db() as db:
+    with get_read_db(token) as db:
         try:
             query = select(auctions)
+            if ids is not None:
+                query = query.where(auctions.c.id.in_(ids))
             result = db.execute(query).mappings().all()
+            names = load_names(db, items=[auction["item_id"] for auction in result])
             auctions_db = []
 
             for auction in result:
@@ -42,7 +57,7 @@ def get_all_auctions(token: Token) -> list[AuctionResponse]:
                     end_date = auction["end_date"],
                     type = auction["type"],
                     state = auction["state"],
-                    item_name = get_item_by_id(auction["item_id"], token).name
+                    item_name = names["items"].get(auction["item_id"])
                 )
                 auctions_db.append(auction_db)
 
@@ -51,19 +66,51 @@ def get_all_auctions(token: Token) -> list[AuctionResponse]:
         except SQLAlchemyError as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
 
-def get_auction_by_id(id: int, token: Token) -> AuctionResponse:
+def search_auctions(q: str, limit: int, offset: int, token: Token) -> list[AuctionResponse]:
     role = get_role(token)
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
+    with get_read_db(token) as db:
+        try:
+            condition, relevance = search_condition(db, [auctions.c.name, auctions.c.description], q)
+            query = (
+                select(auctions, items.c.name.label("item_name"))
+                .join(items, items.c.id == auctions.c.item_id)
+                .where(condition)
+                .order_by(relevance, auctions.c.id)
+                .limit(limit)
+                .offset(offset)
+            )
+            result = db.execute(query).mappings().all()
+            return [
+                AuctionResponse(
+                    id = auction["id"],
+                    name = auction["name"],
+                    description = auction["description"],
+                    start_date = auction["start_date"],
+                    end_date = auction["end_date"],
+                    type = auction["type"],
+                    state = auction["state"],
+                    item_name = auction["item_name"]
+                ) for auction in result
+            ]
+
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
+
+def fetch_auction(id: int) -> AuctionResponse:
+    # Lectura para la cache: siempre del primario, una replica con retraso dejaria en cache
+    # datos que un commit ya invalido
     with get_db() as db:
         try:
             query = select(auctions).where(auctions.c.id == id)
             result = db.execute(query).mappings().first()
             if not result:
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Auction not found")
+                return None
             
-            auction_response = AuctionResponse(
+            names = load_names(db, items=[result["item_id"]])
+            return AuctionResponse(
                 id = result["id"],
                 name = result["name"],
                 description = result["description"],
@@ -71,21 +118,32 @@ def get_auction_by_id(id: int, token: Token) -> AuctionResponse:
                 end_date = result["end_date"],
                 type = result["type"],
                 state = result["state"],
-                item_name = get_item_by_id(result["item_id"], token).name
+                item_name = names["items"].get(result["item_id"])
             )
-            return auction_response
         
         except SQLAlchemyError as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
 
+def get_auction_by_id(id: int, token: Token) -> AuctionResponse:
+    role = get_role(token)
+    if not role:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
+    
+    auction_response = cached("auctions", id, lambda: fetch_auction(id))
+    if not auction_response:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Auction not found")
+    return auction_response
+
 def create_auction(auction: AuctionRequest, token: Token) -> AuctionResponse:
     role = get_role(token)
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
-    now = datetime.now(timezone.utc)
+    now = naive_utc(datetime.now(timezone.utc))
+    start_date = naive_utc(auction.start_date)
+    end_date = naive_utc(auction.end_date)
 
-    if auction.start_date < now or auction.end_date < now or auction.start_date > auction.end_date:
+    if start_date < now or end_date < now or start_date > end_date:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid dates")
     
     now_date = now if auction.state == "EN CURSO" else None
@@ -95,26 +153,29 @@ def create_auction(auction: AuctionRequest, token: Token) -> AuctionResponse:
             new_auction = {
                 "name": auction.name,
                 "description": auction.description,
-                "start_date": auction.start_date if now_date is None else now_date,
-                "end_date": auction.end_date,
+                "start_date": start_date if now_date is None else now_date,
+                "end_date": end_date,
                 "type": auction.type,
                 "state": auction.state,
                 "item_id": auction.item_id
             }
             
             result = db.execute(auctions.insert().values(new_auction))
+            auction_id = result.inserted_primary_key[0]
+            record_change(db, "auctions", auction_id)
+            names = load_names(db, items=[auction.item_id])
             db.commit()
+            mark_write(token)
 
-            auction_id = result.inserted_primary_key[0]
             auction_response = AuctionResponse(
                 id = auction_id,
                 name = auction.name,
                 description = auction.description,
-                start_date = auction.start_date,
-                end_date = auction.end_date,
+                start_date = start_date if now_date is None else now_date,
+                end_date = end_date,
                 type = auction.type,
                 state = auction.state,
-                item_name = get_item_by_id(auction.item_id, token).name
+                item_name = names["items"].get(auction.item_id)
             )
             return auction_response
         
@@ -127,34 +188,61 @@ def update_auction(id: int, auction: AuctionUpdate, token: Token) -> AuctionResp
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
+    values = changed_values(auction, auctions, AuctionResponse)
+    if values.get("state"):
+        values["state"] = AuctionState(values["state"]).value
+    for column in ("start_date", "end_date"):
+        if values.get(column):
+            values[column] = naive_utc(values[column])
+
     with get_db() as db:
         try:
-            auction_db = db.execute(select(auctions).where(auctions.c.id == id)).mappings().first()
+            # Las transiciones de estado dependen del estado actual: la fila se bloquea hasta el commit
+            auction_db = db.execute(select(auctions).where(auctions.c.id == id).with_for_update()).mappings().first()
             if not auction_db:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Auction not found")
             
-            item = get_item_by_id(auction_db["item_id"], token)
-            item_user_id = db.execute(select(users).where(users.c.name == item.user_name)).first().id
-            if auction.state == "FINALIZADA" and auction_db["state"] == "EN CURSO":
-                create_payment(PaymentRequest(item_id=auction_db["item_id"], user_id=item_user_id), token)
+            finishing = values.get("state") == "FINALIZADA" and auction_db["state"] == "EN CURSO"
 
-            if auction.state == "EN CURSO" and auction_db["state"] == "FINALIZADA":
+            if values.get("state") == "EN CURSO" and auction_db["state"] == "FINALIZADA":
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Auction already finished")
             
-            start_date = datetime.now(timezone.utc) if auction.state == "EN CURSO" else auction_db["start_date"]
+            if values.get("state") == "EN CURSO" and not values.get("start_date"):
+                values["start_date"] = naive_utc(datetime.now(timezone.utc))
             
-            auction_updated = {
-                "name": auction.name or auction_db["name"],
-                "description": auction.description or auction_db["description"],
-                "start_date": auction.start_date or start_date,
-                "end_date": auction.end_date or auction_db["end_date"],
-                "type": auction.type or auction_db["type"],
-                "state": auction.state or auction_db["state"],
-                "item_id": auction.item_id or auction_db["item_id"]
-            }
-            db.execute(auctions.update().where(auctions.c.id == id).values(auction_updated))
+            auction_updated = {**auction_db, **values}
+            if values:
+                db.execute(auctions.update().where(auctions.c.id == id).values(values))
+                record_change(db, "auctions", id)
+                if "name" in values:
+                    record_dependents(db, "bids", bids.c.id, bids.c.auction_id == id)
+            if finishing:
+                category_id = db.execute(select(items.c.category_id).where(items.c.id == auction_db["item_id"])).scalar()
+                record_auction_finished(db, category_id)
+                # Sin worker de liquidacion el pago pendiente se crea en esta misma transaccion
+                # (tras el UPDATE a FINALIZADA); sin pujas no hay ganador ni pago
+                if not SETTLEMENT_ENABLED:
+                    insert_pending_payments(db, db.execute(unpaid_winners().where(items.c.id == auction_db["item_id"])).mappings().all())
+            # Con el worker, el pago lo crea y lo cobra al recibir "auction.finished"
+            add_event(db, "auction.finished" if finishing else "auction.updated", id, {
+                "item_id": auction_updated["item_id"],
+                "previous_state": auction_db["state"],
+                "state": auction_updated["state"]
+            })
+            names = load_names(db, items=[auction_updated["item_id"]])
+            auction_response = AuctionResponse(
+                id = id,
+                name = auction_updated["name"],
+                description = auction_updated["description"],
+                start_date = auction_updated["start_date"],
+                end_date = auction_updated["end_date"],
+                type = auction_updated["type"],
+                state = auction_updated["state"],
+                item_name = names["items"].get(auction_updated["item_id"])
+            )
             db.commit()
-            return get_auction_by_id(id, token)
+            mark_write(token)
+            return auction_response
         except SQLAlchemyError as e:
             db.rollback()
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
@@ -166,8 +254,11 @@ def delete_auction_by_id(id: int, token: Token) -> None:
     
     with get_db() as db:
         try:
-            db.execute(auctions.delete().where(auctions.c.id == id))
+            result = db.execute(auctions.delete().where(auctions.c.id == id))
+            if result.rowcount:
+                record_change(db, "auctions", id, DELETE)
             db.commit()
+            mark_write(token)
         except SQLAlchemyError as e:
             db.rollback()
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
\ No newline at end of file
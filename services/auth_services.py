@@ -4,10 +4,10 @@ from fastapi import HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
+from functools import lru_cache
 
 # modulos internos
-from config.db import get_db
+from config.db import get_db, get_read_db
 from models.user_model import users
 from schemas.user_schemas import UserLogin, UserResponse, UserRequest
 from schemas.auth_schemas import Token
@@ -16,13 +16,17 @@ SECRET_KEY = "6484e5ac05dedf7949f015c1bb9478bf8f2087dc3bf3b54a9c696b8a3c166be87a
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 420
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=None)
+def password_context():
+    # passlib y el backend bcrypt se cargan con el primer login o alta, no al arrancar
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_context().verify(plain_password, hashed_password)
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
@@ -70,10 +74,14 @@ def read_access_token(token: str) -> UserResponse:
     except jwt.PyJWTError as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Could not validate credentials: {str(e)}")
     
-    with get_db() as db:
+    with get_read_db(token) as db:
         try:
             query = select(users).where(users.c.email == email)
             user_db = db.execute(query).fetchone()
+            if not user_db:
+                # Un usuario recien registrado puede no haber llegado aun a la replica
+                with get_db() as primary:
+                    user_db = primary.execute(query).fetchone()
             if not user_db:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
             
@@ -0,0 +1,205 @@
+# modulos externos
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+
+# modulos internos
+from schemas.auth_schemas import Token
+from schemas.bid_schemas import BidRequest, BidTicket, BidTicketState
+from services.auth_services import read_access_token
+from services.bid_services import create_bid, PriceChanged
+from services.worker_services import BackgroundWorker, register_worker
+from services.coordination_services import coordinator, LockTimeout
+
+BID_QUEUE_ENABLED = os.getenv("BID_QUEUE_ENABLED", "false").lower() == "true"
+BID_QUEUE_SHARDS = int(os.getenv("BID_QUEUE_SHARDS", "4"))
+BID_QUEUE_MAX_PENDING = int(os.getenv("BID_QUEUE_MAX_PENDING", "5000"))
+BID_QUEUE_RETRIES = int(os.getenv("BID_QUEUE_RETRIES", "3"))
+BID_TICKET_TTL = float(os.getenv("BID_TICKET_TTL", "600"))
+BID_TICKET_MAX = int(os.getenv("BID_TICKET_MAX", "100000"))
+BID_QUEUE_LOCK_TIMEOUT = float(os.getenv("BID_QUEUE_LOCK_TIMEOUT", "5"))
+BID_TICKET_POLL_INTERVAL = float(os.getenv("BID_TICKET_POLL_INTERVAL", "0.2"))
+
+def _wake_waiter(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+class TicketStore:
+    # Tickets en memoria del proceso, con TTL y un maximo de entradas; cada ticket lleva la lista
+    # de peticiones GET /bids/tickets/{id}?wait=N que esperan el veredicto (futures del event
+    # loop, sin ocupar hilos). Con un coordinador compartido tambien se publican para que
+    # cualquier proceso pueda consultarlos
+    def __init__(self, ttl: float = BID_TICKET_TTL, max_tickets: int = BID_TICKET_MAX):
+        self.ttl = ttl
+        self.max_tickets = max_tickets
+        self._tickets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, ticket: BidTicket, owner: str) -> None:
+        with self._lock:
+            self._tickets[ticket.id] = (time.monotonic() + self.ttl, owner, ticket, [])
+            while len(self._tickets) > self.max_tickets:
+                self._tickets.popitem(last=False)
+        self._share(ticket, owner)
+
+    def _share(self, ticket: BidTicket, owner: str) -> None:
+        if coordinator.shared:
+            coordinator.set(f"ticket:{ticket.id}", json.dumps({"owner": owner, "ticket": ticket.model_dump(mode="json")}), self.ttl)
+
+    def get_shared(self, ticket_id: str):
+        if not coordinator.shared:
+            return None
+        value = coordinator.get(f"ticket:{ticket_id}")
+        if not value:
+            return None
+        data = json.loads(value)
+        return data["owner"], BidTicket(**data["ticket"])
+
+    def get(self, ticket_id: str):
+        with self._lock:
+            entry = self._tickets.get(ticket_id)
+            if entry and entry[0] <= time.monotonic():
+                del self._tickets[ticket_id]
+                return None
+            return entry
+
+    def resolve(self, ticket_id: str, **changes) -> None:
+        with self._lock:
+            entry = self._tickets.get(ticket_id)
+            if not entry:
+                return
+            expires, owner, ticket, waiters = entry
+            ticket = ticket.model_copy(update=changes)
+            self._tickets[ticket_id] = (expires, owner, ticket, [])
+        self._share(ticket, owner)
+        # resolve() corre en el hilo del secuenciador: los futures se completan en su event loop
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake_waiter, waiter)
+
+    async def wait(self, ticket_id: str, timeout: float) -> None:
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        with self._lock:
+            entry = self._tickets.get(ticket_id)
+            if not entry or entry[2].state != BidTicketState.queued:
+                return
+            entry[3].append((loop, waiter))
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                entry = self._tickets.get(ticket_id)
+                if entry and (loop, waiter) in entry[3]:
+                    entry[3].remove((loop, waiter))
+
+tickets = TicketStore()
+
+class BidSequencer(BackgroundWorker):
+    # Cada subasta cae siempre en el mismo shard, asi sus pujas se procesan en orden de llegada
+    interval = 1.0
+
+    def __init__(self, shard: int):
+        super().__init__()
+        self.name = f"bid-sequencer-{shard}"
+        self.queue = queue.Queue(maxsize=BID_QUEUE_MAX_PENDING)
+
+    def backlog(self) -> int:
+        return self.queue.qsize()
+
+    def enqueue(self, entry: tuple) -> None:
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Bid queue is full, retry later", headers={"Retry-After": "1"})
+        self.wake()
+
+    def run_once(self) -> int:
+        try:
+            ticket_id, bid, token, received_at = self.queue.get_nowait()
+        except queue.Empty:
+            return 0
+
+        for attempt in range(BID_QUEUE_RETRIES):
+            try:
+                # Con varios procesos el cerrojo por subasta mantiene un unico escritor a la vez
+                with coordinator.lock(f"auction:{bid.auction_id}", BID_QUEUE_LOCK_TIMEOUT):
+                    response = create_bid(bid, token, received_at)
+                tickets.resolve(ticket_id, state=BidTicketState.accepted, bid=response, status_code=status.HTTP_200_OK)
+                break
+            except LockTimeout:
+                if attempt + 1 < BID_QUEUE_RETRIES:
+                    continue
+                tickets.resolve(ticket_id, state=BidTicketState.rejected, status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Auction is busy, retry later")
+                break
+            except PriceChanged as e:
+                # Otra puja (sincrona o de otro proceso) se adelanto
+                if attempt + 1 < BID_QUEUE_RETRIES:
+                    continue
+                tickets.resolve(ticket_id, state=BidTicketState.rejected, status_code=e.status_code, detail=str(e.detail))
+                break
+            except HTTPException as e:
+                tickets.resolve(ticket_id, state=BidTicketState.rejected, status_code=e.status_code, detail=str(e.detail))
+                break
+            except Exception as e:
+                tickets.resolve(ticket_id, state=BidTicketState.rejected, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"{type(e).__name__}: {e}")
+                break
+        return 1
+
+sequencers = [register_worker(BidSequencer(shard)) for shard in range(BID_QUEUE_SHARDS)]
+
+def sequencer_for(auction_id: int) -> BidSequencer:
+    return sequencers[auction_id % len(sequencers)]
+
+def enqueue_bid(bid: BidRequest, token: Token) -> BidTicket:
+    token_data = read_access_token(token)
+    if not token_data:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    # La hora de llegada se fija aqui: es la que cuenta para el cierre de la subasta
+    ticket = BidTicket(
+        id = uuid.uuid4().hex,
+        auction_id = bid.auction_id,
+        state = BidTicketState.queued,
+        received_at = datetime.now(timezone.utc)
+    )
+    tickets.add(ticket, token_data.email)
+    try:
+        sequencer_for(bid.auction_id).enqueue((ticket.id, bid, token, ticket.received_at))
+    except HTTPException:
+        tickets.resolve(ticket.id, state=BidTicketState.rejected, status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Bid queue is full")
+        raise
+    return ticket
+
+async def get_ticket(ticket_id: str, token: Token, wait: float = 0) -> BidTicket:
+    # Las lecturas bloqueantes (token, coordinador) van al threadpool; la espera no ocupa hilos
+    token_data = await run_in_threadpool(read_access_token, token)
+    if not token_data:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    entry = tickets.get(ticket_id)
+    if entry:
+        owner, ticket = entry[1], entry[2]
+    else:
+        # Ticket emitido por otro proceso
+        owner, ticket = await run_in_threadpool(tickets.get_shared, ticket_id) or (None, None)
+    if not ticket or (owner != token_data.email and token_data.role != "ADMIN"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
+
+    if wait and ticket.state == BidTicketState.queued:
+        if entry:
+            await tickets.wait(ticket_id, wait)
+            return (tickets.get(ticket_id) or entry)[2]
+        deadline = time.monotonic() + wait
+        while ticket.state == BidTicketState.queued and time.monotonic() < deadline:
+            await asyncio.sleep(min(BID_TICKET_POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+            ticket = (await run_in_threadpool(tickets.get_shared, ticket_id) or (owner, ticket))[1]
+    return ticket
@@ -1,20 +1,35 @@
 # modulos externos
+import os
+
 from fastapi import HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
-from datetime import datetime
+from datetime import datetime, timezone
 
 # modulos internos
-from config.db import get_db
+from config.db import get_db, get_read_db, mark_write
 from models.bid_model import bids
-from models.user_model import users
+from models.archive_model import bids_archive
+from models.item_model import items
+from models.auction_model import auctions
 from schemas.bid_schemas import BidResponse, BidRequest, BidUpdate
+from schemas.auction_schemas import AuctionState
 from schemas.auth_schemas import Token
-from schemas.item_schemas import ItemUpdate
 from services.auth_services import read_access_token
-from services.auction_services import get_auction_by_id
-from services.user_services import get_user_by_id
-from services.item_services import get_item_id_by_name, get_item_by_id, update_item
+from services.outbox_services import add_event
+from services.sync_services import record_change, record_changes, DELETE
+from services.loader_services import load_names
+from services.patch_services import changed_values
+from services.cache_services import cached, invalidate
+
+# Pujas mas altas que se guardan en cache por subasta; las peticiones pueden pedir menos
+TOP_BIDS_SIZE = int(os.getenv("TOP_BIDS_SIZE", "10"))
+
+class PriceChanged(HTTPException):
+    # Otra puja se adelanto entre la lectura y el UPDATE condicional: es el unico 409 que se
+    # puede reintentar (una subasta cerrada sigue cerrada)
+    def __init__(self):
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail="The item price changed, retry the bid")
 
 def get_role(token: Token) -> str:
     with get_db() as db:
@@ -23,15 +38,20 @@ def get_role(token: Token) -> str:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
         return token_data.role
 
-def get_all_bids(token: Token) -> list[BidResponse]:
+def get_all_bids(token: Token, archived: bool = False, ids: list[int] = None) -> list[BidResponse]:
     role = get_role(token)
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
-    with get_db() as db:
+    with get_read_db(token) as db:
         try:
             query = select(bids)
+            if ids is not None:
+                query = query.where(bids.c.id.in_(ids))
+            if archived:
+                query = query.union_all(select(*(bids_archive.c[column.name] for column in bids.c)))
             result = db.execute(query).mappings().all()
+            names = load_names(db, auctions=[bid["auction_id"] for bid in result], users=[bid["user_id"] for bid in result])
             bids_db = []
 
             for bid in result:
@@ -39,8 +59,8 @@ def get_all_bids(token: Token) -> list[BidResponse]:
                     id = bid["id"],
                     amount = bid["amount"],
                     date = bid["date"],
-                    auction_name = get_auction_by_id(bid["auction_id"], token).name,
-                    user_name = get_user_by_id(bid["user_id"]).name
+                    auction_name = names["auctions"].get(bid["auction_id"]),
+                    user_name = names["users"].get(bid["user_id"])
                 )
                 bids_db.append(bid_db)
 
@@ -49,24 +69,27 @@ def get_all_bids(token: Token) -> list[BidResponse]:
         except SQLAlchemyError as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
 
-def get_bid_by_id(id: int, token: Token) -> BidResponse:
+def get_bid_by_id(id: int, token: Token, archived: bool = False) -> BidResponse:
     role = get_role(token)
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
-    with get_db() as db:
+    with get_read_db(token) as db:
         try:
             query = select(bids).where(bids.c.id == id)
             result = db.execute(query).mappings().first()
+            if not result and archived:
+                result = db.execute(select(bids_archive).where(bids_archive.c.id == id)).mappings().first()
             if not result:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Bid with id {id} not found")
             
+            names = load_names(db, auctions=[result["auction_id"]], users=[result["user_id"]])
             bid_db = BidResponse(
                 id = result["id"],
                 amount = result["amount"],
                 date = result["date"],
-                auction_name = get_auction_by_id(result["auction_id"], token).name,
-                user_name = get_user_by_id(result["user_id"]).name
+                auction_name = names["auctions"].get(result["auction_id"]),
+                user_name = names["users"].get(result["user_id"])
             )
 
             return bid_db
@@ -74,40 +97,113 @@ def get_bid_by_id(id: int, token: Token) -> BidResponse:
         except SQLAlchemyError as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
 
-def create_bid(bid: BidRequest, token: Token) -> BidResponse:
+def fetch_top_bids(auction_id: int) -> list[BidResponse]:
+    # Lectura para la cache, siempre del primario
+    with get_db() as db:
+        try:
+            result = db.execute(
+                select(bids)
+                .where(bids.c.auction_id == auction_id)
+                .order_by(bids.c.amount.desc(), bids.c.id)
+                .limit(TOP_BIDS_SIZE)
+            ).mappings().all()
+            names = load_names(db, auctions=[auction_id], users=[bid["user_id"] for bid in result])
+            return [
+                BidResponse(
+                    id = bid["id"],
+                    amount = bid["amount"],
+                    date = bid["date"],
+                    auction_name = names["auctions"].get(auction_id),
+                    user_name = names["users"].get(bid["user_id"])
+                ) for bid in result
+            ]
+
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
+
+def get_top_bids(auction_id: int, limit: int, token: Token) -> list[BidResponse]:
     role = get_role(token)
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
+
+    return cached("top_bids", auction_id, lambda: fetch_top_bids(auction_id))[:limit]
+
+def auction_closed(state: str, end_date: datetime, received_at: datetime) -> bool:
+    # Corte estricto: cuenta la hora de llegada de la puja, no la de su procesamiento
+    if state == AuctionState.finished.value:
+        return True
+    if end_date is None:
+        return False
+    if end_date.tzinfo is None:
+        end_date = end_date.replace(tzinfo=timezone.utc)
+    return received_at > end_date
+
+def create_bid(bid: BidRequest, token: Token, received_at: datetime = None) -> BidResponse:
+    # Una sola lectura del usuario: el token ya trae su id y su nombre
+    user = read_access_token(token)
+    if not user.role:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
     with get_db() as db:
         try:
-            token_email = read_access_token(token).email
-            user = db.execute(select(users).where(users.c.email == token_email)).mappings().first()
 
-            item_name = get_auction_by_id(bid.auction_id, token).item_name
-            item_id = get_item_id_by_name(item_name)
+            # Una sola lectura para la subasta y su articulo
+            item = db.execute(
+                select(
+                    items.c.id, items.c.final_price, items.c.category_id,
+                    auctions.c.name.label("auction_name"), auctions.c.state, auctions.c.end_date
+                )
+                .join(auctions, auctions.c.item_id == items.c.id)
+                .where(auctions.c.id == bid.auction_id)
+            ).mappings().first()
+            if not item:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Auction not found")
+            if auction_closed(item["state"], item["end_date"], received_at or datetime.now(timezone.utc)):
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Auction is closed")
+
+            # Aritmetica exacta con Decimal: el precio leido sirve de version para el UPDATE condicional
+            current_price = item["final_price"]
+            bid_date = datetime.now()
             
             new_bid = {
                 "amount": bid.amount,
-                "date": datetime.now(),
+                "date": bid_date,
                 "auction_id": bid.auction_id,
-                "user_id": user["id"]
+                "user_id": user.id
             }
             
             result = db.execute(bids.insert().values(new_bid))
-            db.commit()
-
             bid_id = result.inserted_primary_key[0]
 
-            final_price = float(get_item_by_id(item_id, token).final_price) + bid.amount
-            update_item(item_id, ItemUpdate(final_price=final_price, user_id=user["id"]), token)
+            price_update = db.execute(
+                items.update()
+                .where(items.c.id == item["id"], items.c.final_price == current_price)
+                .values(final_price=current_price + bid.amount, user_id=user.id)
+            )
+            if price_update.rowcount == 0:
+                db.rollback()
+                raise PriceChanged()
+
+            record_changes(db, [("bids", bid_id), ("items", item["id"])])
+            invalidate(db, "top_bids", bid.auction_id)
+            add_event(db, "bid.created", bid_id, {
+                "auction_id": bid.auction_id,
+                "item_id": item["id"],
+                "category_id": item["category_id"],
+                "user_id": user.id,
+                "amount": bid.amount,
+                "final_price": current_price + bid.amount,
+                "date": bid_date
+            })
+            db.commit()
+            mark_write(token)
 
             bid_response = BidResponse(
                 id = bid_id,
                 amount = bid.amount,
-                date = datetime.now(),
-                auction_name = get_auction_by_id(bid.auction_id, token).name,
-                user_name = user["name"]
+                date = bid_date,
+                auction_name = item["auction_name"],
+                user_name = user.name
             )
             return bid_response
 
@@ -120,21 +216,34 @@ def update_bid(id: int, bid: BidUpdate, token: Token) -> BidResponse:
     if not role or role != "ADMIN":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
+    values = changed_values(bid, bids, BidResponse)
     with get_db() as db:
         try:
+            if values:
+                # Si la puja cambia de subasta tambien cambian las pujas mas altas de la anterior
+                if "auction_id" in values:
+                    invalidate(db, "top_bids", db.execute(select(bids.c.auction_id).where(bids.c.id == id)).scalar())
+                result = db.execute(bids.update().where(bids.c.id == id).values(values))
+                if result.rowcount == 0:
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bid not found")
+                record_change(db, "bids", id)
+
             bid_db = db.execute(select(bids).where(bids.c.id == id)).mappings().first()
             if not bid_db:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bid not found")
-            
-            bid_updated = {
-                "amount": bid.amount or bid_db["amount"],
-                "date": bid.date or bid_db["date"],
-                "auction_id": bid.auction_id or bid_db["auction_id"],
-                "user_id": bid.user_id or bid_db["user_id"]
-            }
-            db.execute(bids.update().where(bids.c.id == id).values(bid_updated))
+            if values:
+                invalidate(db, "top_bids", bid_db["auction_id"])
+            names = load_names(db, auctions=[bid_db["auction_id"]], users=[bid_db["user_id"]])
+            bid_response = BidResponse(
+                id = id,
+                amount = bid_db["amount"],
+                date = bid_db["date"],
+                auction_name = names["auctions"].get(bid_db["auction_id"]),
+                user_name = names["users"].get(bid_db["user_id"])
+            )
             db.commit()
-            return get_bid_by_id(id, token)
+            mark_write(token)
+            return bid_response
         
         except SQLAlchemyError as e:
             db.rollback()
@@ -147,8 +256,13 @@ def delete_bid_by_id(id: int, token: Token) -> None:
     
     with get_db() as db:
         try:
-            db.execute(bids.delete().where(bids.c.id == id))
+            auction_id = db.execute(select(bids.c.auction_id).where(bids.c.id == id)).scalar()
+            result = db.execute(bids.delete().where(bids.c.id == id))
+            if result.rowcount:
+                record_change(db, "bids", id, DELETE)
+                invalidate(db, "top_bids", auction_id)
             db.commit()
+            mark_write(token)
         except SQLAlchemyError as e:
             db.rollback()
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,166 @@
+# modulos externos
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable
+
+from sqlalchemy import event
+
+# modulos internos
+from config.db import SessionLocal
+from services.coordination_services import coordinator, coordination_worker
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2000"))
+CACHE_WAIT = float(os.getenv("CACHE_WAIT", "5"))
+
+CACHE_CHANNEL = "cache.invalidate"
+
+class Flight:
+    # Carga en curso de una clave: los demas hilos esperan su resultado en lugar de repetir la consulta
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.stale = False
+
+class ReadCache:
+    # Cache de lectura por proceso con TTL y maximo de entradas (LRU). Los valores son las
+    # respuestas ya construidas y no deben modificarse. Con single-flight, cuando una clave
+    # caduca o se invalida solo un hilo va a la base de datos
+    def __init__(self, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._in_flight: dict[str, Flight] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: str, load: Callable, ttl: float = None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            flight = self._in_flight.get(key)
+            if flight is None:
+                flight = self._in_flight[key] = Flight()
+                leader = True
+            else:
+                leader = False
+
+        if leader:
+            return self._load(key, flight, load, ttl)
+
+        # Si la carga tarda demasiado se consulta sin cache en lugar de bloquear la peticion
+        if not flight.done.wait(CACHE_WAIT):
+            return load()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def refresh(self, key: str, load: Callable, ttl: float = None) -> bool:
+        # Recarga la clave aunque siga vigente; si otro hilo ya la esta cargando no hace nada
+        with self._lock:
+            if key in self._in_flight:
+                return False
+            flight = self._in_flight[key] = Flight()
+        self._load(key, flight, load, ttl)
+        return True
+
+    def _load(self, key: str, flight: Flight, load: Callable, ttl: float):
+        try:
+            flight.value = load()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                # Una escritura confirmada durante la carga deja el valor leido obsoleto: no se guarda
+                if flight.error is None and not flight.stale and flight.value is not None:
+                    self._entries[key] = (time.monotonic() + (ttl or self.ttl), flight.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                flight = self._in_flight.get(key)
+                if flight:
+                    flight.stale = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for flight in self._in_flight.values():
+                flight.stale = True
+
+    def status(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+read_cache = ReadCache()
+
+def cache_key(entity: str, id) -> str:
+    return f"{entity}:{id}"
+
+def cached(entity: str, id, load: Callable):
+    if not CACHE_ENABLED:
+        return load()
+    return read_cache.get_or_load(cache_key(entity, id), load)
+
+def invalidate(db, entity: str, ids) -> None:
+    # Las claves se acumulan en la sesion y se invalidan tras el commit: si la transaccion
+    # se deshace la cache sigue siendo valida
+    if isinstance(ids, int):
+        ids = [ids]
+    db.info.setdefault("cache_keys", set()).update(cache_key(entity, id) for id in ids if id is not None)
+
+# Claves invalidadas aqui y pendientes de avisar a los demas procesos
+_broadcast_keys: set[str] = set()
+_broadcast_lock = threading.Lock()
+
+def broadcast_invalidations() -> None:
+    # Lo llama el worker de coordinacion antes de cada tick: todas las escrituras confirmadas
+    # desde el ultimo aviso salen en un solo mensaje
+    with _broadcast_lock:
+        if not _broadcast_keys:
+            return
+        keys = sorted(_broadcast_keys)
+        _broadcast_keys.clear()
+    try:
+        coordinator.publish(CACHE_CHANNEL, {"keys": keys})
+    except Exception:
+        logger.exception("Cache invalidation broadcast failed, entries expire in %s s", CACHE_TTL)
+
+@event.listens_for(SessionLocal, "after_commit")
+def invalidate_committed(session) -> None:
+    keys = session.info.pop("cache_keys", None)
+    if not keys:
+        return
+    read_cache.invalidate(keys)
+    # Los demas procesos tienen su propia cache: el aviso sale del worker de coordinacion, no
+    # de la peticion que confirmo la escritura
+    if coordinator.shared:
+        with _broadcast_lock:
+            _broadcast_keys.update(keys)
+        coordination_worker.wake()
+
+@event.listens_for(SessionLocal, "after_rollback")
+def discard_keys(session) -> None:
+    session.info.pop("cache_keys", None)
+
+coordinator.subscribe(CACHE_CHANNEL, lambda message: read_cache.invalidate(message["keys"]))
+coordinator.before_tick(broadcast_invalidations)
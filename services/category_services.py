@@ -4,11 +4,14 @@ from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 
 # modulos internos
-from config.db import get_db
+from config.db import get_db, get_read_db, mark_write
 from models.category_model import categories
+from models.item_model import items
 from schemas.category_schemas import CategoryResponse, CategoryRequest
 from schemas.auth_schemas import Token
 from services.auth_services import read_access_token
+from services.cache_services import cached, invalidate
+from services.sync_services import record_dependents
 
 def get_role(token: Token) -> str:
     with get_db() as db:
@@ -22,7 +25,7 @@ def get_all_categories(token: Token) -> list[CategoryResponse]:
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
-    with get_db() as db:
+    with get_read_db(token) as db:
         try:
             query = select(categories)
             result = db.execute(query).mappings().all()
@@ -37,26 +40,32 @@ def get_all_categories(token: Token) -> list[CategoryResponse]:
         except SQLAlchemyError as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
     
-def get_category_by_id(id: int, token: Token) -> CategoryResponse:
-    role = get_role(token)
-    if not role:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
-    
+def fetch_category(id: int) -> CategoryResponse:
+    # Lectura para la cache, siempre del primario
     with get_db() as db:
         try:
             query = select(categories).where(categories.c.id == id)
             result = db.execute(query).mappings().first()
             if not result:
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+                return None
             
-            category_db = CategoryResponse(
+            return CategoryResponse(
                 id = result["id"],
                 name = result["name"]
             )
-            return category_db
         
         except SQLAlchemyError as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
+
+def get_category_by_id(id: int, token: Token) -> CategoryResponse:
+    role = get_role(token)
+    if not role:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
+    
+    category_db = cached("categories", id, lambda: fetch_category(id))
+    if not category_db:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+    return category_db
     
 def create_category(category: CategoryRequest, token: Token) -> CategoryResponse:
     role = get_role(token)
@@ -70,6 +79,7 @@ def create_category(category: CategoryRequest, token: Token) -> CategoryResponse
             }
             result = db.execute(categories.insert().values(new_category))
             db.commit()
+            mark_write(token)
 
             category_id = result.inserted_primary_key[0]
             return CategoryResponse(
@@ -87,14 +97,18 @@ def update_category(id: int, category: CategoryRequest, token: Token) -> Categor
     
     with get_db() as db:
         try:
-            category_db = db.execute(select(categories).where(categories.c.id == id)).mappings().first()
-            if not category_db:
+            result = db.execute(categories.update().where(categories.c.id == id).values({"name": category.name}))
+            if result.rowcount == 0:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
-            
-            db.execute(categories.update().where(categories.c.id == id).values({"name": category.name}))
+            invalidate(db, "categories", id)
+            record_dependents(db, "items", items.c.id, items.c.category_id == id)
             db.commit()
+            mark_write(token)
 
-            return get_category_by_id(id, token)
+            return CategoryResponse(
+                id = id,
+                name = category.name
+            )
         except SQLAlchemyError as e:
             db.rollback()
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
@@ -107,7 +121,9 @@ def delete_category_by_id(id: int, token: Token) -> None:
     with get_db() as db:
         try:
             db.execute(categories.delete().where(categories.c.id == id))
+            invalidate(db, "categories", id)
             db.commit()
+            mark_write(token)
         except SQLAlchemyError as e:
             db.rollback()
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
\ No newline at end of file
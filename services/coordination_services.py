@@ -0,0 +1,297 @@
+# modulos externos
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import mysql, sqlite
+
+# modulos internos
+from config.db import engine, get_db
+from models.coordination_model import coordination_messages, coordination_values
+from services.worker_services import BackgroundWorker, register_worker
+
+logger = logging.getLogger(__name__)
+
+# "local" (un solo proceso), "database" (MySQL: GET_LOCK y tablas de coordinacion) o "redis"
+COORDINATION_BACKEND = os.getenv("COORDINATION_BACKEND", "local")
+COORDINATION_REDIS_URL = os.getenv("COORDINATION_REDIS_URL")
+COORDINATION_INTERVAL = float(os.getenv("COORDINATION_INTERVAL", "0.5"))
+COORDINATION_MESSAGE_TTL = float(os.getenv("COORDINATION_MESSAGE_TTL", "60"))
+# Los ids autoincrementales no se confirman en orden: cada sondeo relee esta ventana de
+# segundos y descarta los mensajes ya vistos. Debe ser menor que COORDINATION_MESSAGE_TTL
+COORDINATION_POLL_WINDOW = float(os.getenv("COORDINATION_POLL_WINDOW", "10"))
+COORDINATION_LOCK_LEASE = float(os.getenv("COORDINATION_LOCK_LEASE", "30"))
+COORDINATION_LOCAL_MAX_VALUES = int(os.getenv("COORDINATION_LOCAL_MAX_VALUES", "100000"))
+
+# Cada worker de uvicorn es un proceso distinto: el pid lo distingue dentro del mismo host
+MEMBER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+class LockTimeout(Exception):
+    pass
+
+class LocalCoordinator:
+    # Implementacion de un solo proceso; las demas heredan la interfaz:
+    # lock(), get()/set(), publish()/subscribe(), before_tick() y tick()
+    shared = False
+
+    def __init__(self):
+        self.member_id = MEMBER_ID
+        self._handlers: dict[str, list[Callable[[dict], None]]] = {}
+        self._before_tick: list[Callable[[], None]] = []
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._values = {}
+        self._values_guard = threading.Lock()
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 10.0):
+        # Un Lock por nombre, con contador de usuarios para no acumular nombres sin uso
+        with self._locks_guard:
+            entry = self._locks.setdefault(name, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            if not entry[0].acquire(timeout=timeout):
+                raise LockTimeout(name)
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    self._locks.pop(name, None)
+
+    def get(self, key: str):
+        with self._values_guard:
+            entry = self._values.get(key)
+            if entry and entry[0] <= time.monotonic():
+                del self._values[key]
+                return None
+            return entry[1] if entry else None
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with self._values_guard:
+            if len(self._values) >= COORDINATION_LOCAL_MAX_VALUES:
+                now = time.monotonic()
+                for expired in [k for k, (expires, _) in self._values.items() if expires <= now]:
+                    del self._values[expired]
+            self._values[key] = (time.monotonic() + ttl, value)
+
+    def subscribe(self, channel: str, handler: Callable[[dict], None]) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def publish(self, channel: str, message: dict) -> None:
+        self.dispatch(channel, message)
+
+    def before_tick(self, callback: Callable[[], None]) -> None:
+        # Para difusiones agrupadas: el worker de coordinacion llama a callback() antes de cada tick()
+        self._before_tick.append(callback)
+
+    def flush(self) -> None:
+        for callback in self._before_tick:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Coordination flush failed")
+
+    def dispatch(self, channel: str, message: dict) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(message)
+            except Exception:
+                logger.exception("Coordination handler for %s failed", channel)
+
+    def tick(self) -> None:
+        pass
+
+class DatabaseCoordinator(LocalCoordinator):
+    # Coordinacion a traves de la base de datos principal: cerrojos con GET_LOCK (MySQL),
+    # y difusion por sondeo de coordination_messages
+    shared = True
+
+    def __init__(self):
+        super().__init__()
+        self._poll_from = None
+        self._seen = OrderedDict()
+        self._last_cleanup = 0.0
+        self._advisory = engine.dialect.name == "mysql"
+        if not self._advisory:
+            logger.warning("Advisory locks need MySQL; %s uses process-local locks", engine.dialect.name)
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 10.0):
+        if not self._advisory:
+            with super().lock(name, timeout):
+                yield
+            return
+
+        # GET_LOCK pertenece a la sesion: la conexion se mantiene hasta liberarlo. Nombres de 64 como maximo
+        lock_name = name if len(name) <= 64 else hashlib.sha1(name.encode()).hexdigest()
+        with engine.connect() as connection:
+            acquired = connection.execute(text("SELECT GET_LOCK(:name, :timeout)"), {"name": lock_name, "timeout": timeout}).scalar()
+            if acquired != 1:
+                raise LockTimeout(name)
+            try:
+                yield
+            finally:
+                connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": lock_name})
+
+    def _upsert(self, db, table, values: dict, key: str, update: list[str]) -> None:
+        if db.get_bind().dialect.name == "mysql":
+            statement = mysql.insert(table).values(values)
+            statement = statement.on_duplicate_key_update({column: statement.inserted[column] for column in update})
+        else:
+            statement = sqlite.insert(table).values(values)
+            statement = statement.on_conflict_do_update(index_elements=[key], set_={column: statement.excluded[column] for column in update})
+        db.execute(statement)
+
+    def get(self, key: str):
+        with get_db() as db:
+            return db.execute(
+                select(coordination_values.c.value)
+                .where(coordination_values.c.key == key, coordination_values.c.expires_at > datetime.now())
+            ).scalar()
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with get_db() as db:
+            self._upsert(db, coordination_values, {
+                "key": key,
+                "value": value,
+                "expires_at": datetime.now() + timedelta(seconds=ttl)
+            }, "key", ["value", "expires_at"])
+            db.commit()
+
+    def publish(self, channel: str, message: dict) -> None:
+        with get_db() as db:
+            db.execute(coordination_messages.insert().values(
+                channel = channel,
+                payload = json.dumps(message),
+                origin = self.member_id,
+                created_at = datetime.now()
+            ))
+            db.commit()
+        self.dispatch(channel, message)
+
+    def tick(self) -> None:
+        now = time.monotonic()
+        polled_at = datetime.now()
+        window_start = (self._poll_from or polled_at) - timedelta(seconds=COORDINATION_POLL_WINDOW)
+        with get_db() as db:
+            messages = db.execute(
+                select(coordination_messages)
+                .where(coordination_messages.c.created_at >= window_start)
+                .order_by(coordination_messages.c.id)
+            ).mappings().all()
+
+            if now - self._last_cleanup >= COORDINATION_MESSAGE_TTL:
+                cutoff = datetime.now() - timedelta(seconds=COORDINATION_MESSAGE_TTL)
+                db.execute(coordination_messages.delete().where(coordination_messages.c.created_at < cutoff))
+                db.execute(coordination_values.delete().where(coordination_values.c.expires_at < datetime.now()))
+                self._last_cleanup = now
+            db.commit()
+
+        if self._poll_from is None:
+            # Solo interesan los mensajes posteriores al arranque: los del primer sondeo se marcan como vistos
+            self._seen.update((message["id"], message["created_at"]) for message in messages)
+            messages = []
+        self._poll_from = polled_at
+
+        for message in messages:
+            if message["id"] in self._seen:
+                continue
+            self._seen[message["id"]] = message["created_at"]
+            if message["origin"] != self.member_id:
+                self.dispatch(message["channel"], json.loads(message["payload"]))
+
+        # Los ids fuera de la ventana ya no pueden volver a leerse
+        while self._seen and next(iter(self._seen.values())) < window_start:
+            self._seen.popitem(last=False)
+
+class RedisCoordinator(LocalCoordinator):
+    # Misma interfaz sobre Redis: SET NX PX para los cerrojos y pub/sub para la difusion;
+    # requiere el paquete `redis`
+    shared = True
+
+    RELEASE_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+    return 0
+    """
+
+    def __init__(self, url: str):
+        super().__init__()
+        import redis
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._release = self._client.register_script(self.RELEASE_SCRIPT)
+        self._pubsub = None
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 10.0):
+        key = f"coord:lock:{name}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while not self._client.set(key, token, nx=True, px=int(COORDINATION_LOCK_LEASE * 1000)):
+            if time.monotonic() >= deadline:
+                raise LockTimeout(name)
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            self._release(keys=[key], args=[token])
+
+    def get(self, key: str):
+        return self._client.get(f"coord:value:{key}")
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self._client.set(f"coord:value:{key}", value, px=int(ttl * 1000))
+
+    def publish(self, channel: str, message: dict) -> None:
+        self._client.publish(f"coord:channel:{channel}", json.dumps({"origin": self.member_id, "message": message}))
+        self.dispatch(channel, message)
+
+    def tick(self) -> None:
+        if self._pubsub is None:
+            self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.psubscribe("coord:channel:*")
+        while True:
+            message = self._pubsub.get_message()
+            if not message:
+                break
+            data = json.loads(message["data"])
+            if data["origin"] != self.member_id:
+                self.dispatch(message["channel"][len("coord:channel:"):], data["message"])
+
+def create_coordinator() -> LocalCoordinator:
+    if COORDINATION_BACKEND == "redis":
+        return RedisCoordinator(COORDINATION_REDIS_URL)
+    if COORDINATION_BACKEND == "database":
+        return DatabaseCoordinator()
+    return LocalCoordinator()
+
+coordinator = create_coordinator()
+
+class CoordinationWorker(BackgroundWorker):
+    name = "coordination"
+    interval = COORDINATION_INTERVAL
+
+    def run_once(self) -> int:
+        coordinator.flush()
+        coordinator.tick()
+        return 0
+
+coordination_worker = register_worker(CoordinationWorker(), enabled=coordinator.shared)
+
+def sticky_headers(auction_id: int) -> dict:
+    # Pista de enrutado entre nodos: el cliente reenvia X-Sticky-Key y nginx lo usa como clave
+    # de hash. Dentro de un nodo el orden de las pujas lo garantiza el cerrojo por subasta
+    return {"X-Sticky-Key": f"auction-{auction_id}"}
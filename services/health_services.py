@@ -0,0 +1,83 @@
+# modulos externos
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable
+
+from sqlalchemy import text
+
+# modulos internos
+from config.db import engine, pool_wait_histogram, replica_router, WEB_CONCURRENCY
+
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "1.0"))
+READY_POOL_SATURATION = float(os.getenv("READY_POOL_SATURATION", "0.9"))
+
+# Un solo hilo y un solo ping en curso: si la base de datos se cuelga, las comprobaciones
+# siguientes esperan ese mismo ping en lugar de encolar otro detras
+_probe_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="readyz")
+_ping_lock = threading.Lock()
+_pending_ping: Future = None
+
+# Comprobaciones adicionales (workers en segundo plano, colas...) registradas por otros modulos.
+# Cada funcion devuelve un dict con al menos la clave "ready".
+_checks: dict[str, Callable[[], dict]] = {}
+
+def register_check(name: str, check: Callable[[], dict]) -> None:
+    _checks[name] = check
+
+def pool_status() -> dict:
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {"class": type(pool).__name__}
+
+    capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+    checked_out = pool.checkedout()
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "capacity": capacity,
+        "checked_out": checked_out,
+        "overflow": pool.overflow(),
+        "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+        "workers": WEB_CONCURRENCY,
+        "wait_seconds": pool_wait_histogram.snapshot()
+    }
+
+def _ping() -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+def _submit_ping() -> Future:
+    global _pending_ping
+    with _ping_lock:
+        if _pending_ping is None or _pending_ping.done():
+            _pending_ping = _probe_executor.submit(_ping)
+        return _pending_ping
+
+def check_database() -> dict:
+    status = pool_status()
+    if status.get("saturation", 0.0) >= READY_POOL_SATURATION:
+        return {"ready": False, "reason": "pool saturated", "pool": status}
+
+    try:
+        _submit_ping().result(timeout=READY_TIMEOUT)
+    except FutureTimeoutError:
+        return {"ready": False, "reason": "connection checkout timed out", "pool": status}
+    except Exception as e:
+        return {"ready": False, "reason": f"database error: {type(e).__name__}", "pool": status}
+
+    return {"ready": True, "pool": status}
+
+def readiness() -> tuple[bool, dict]:
+    report = {"database": check_database()}
+    if replica_router.engines:
+        # Las replicas caidas no quitan trafico: las lecturas vuelven al primario
+        report["replicas"] = {"ready": True, "replicas": replica_router.status()}
+    for name, check in _checks.items():
+        try:
+            report[name] = check()
+        except Exception as e:
+            report[name] = {"ready": False, "reason": f"{type(e).__name__}: {e}"}
+
+    ready = all(result.get("ready", False) for result in report.values())
+    return ready, report
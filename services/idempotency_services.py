@@ -0,0 +1,125 @@
+# modulos externos
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+# modulos internos
+from services.auth_services import read_access_token
+from services.coordination_services import coordinator, LockTimeout
+
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "50000"))
+IDEMPOTENCY_WAIT = float(os.getenv("IDEMPOTENCY_WAIT", "10"))
+
+class IdempotencyStore:
+    # Guarda por clave (digest de 16 bytes) la huella de la peticion y el cuerpo JSON ya
+    # serializado de la respuesta, con TTL y un maximo de entradas (LRU)
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL, max_keys: int = IDEMPOTENCY_MAX_KEYS):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: bytes):
+        entry = self._entries.get(key)
+        if entry and entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    def begin(self, key: bytes, fingerprint: bytes):
+        # Devuelve el cuerpo guardado si la peticion ya se ejecuto, o None si el llamador debe ejecutarla
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT
+        while True:
+            with self._lock:
+                entry = self._get(key)
+                if entry:
+                    if entry[1] != fingerprint:
+                        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Idempotency-Key reused with a different request")
+                    return entry[2]
+                in_flight = self._in_flight.get(key)
+                if in_flight is None:
+                    self._in_flight[key] = threading.Event()
+                    return None
+
+            # Un reintento llega mientras el original sigue en curso: se espera su resultado
+            if not in_flight.wait(max(0.0, deadline - time.monotonic())):
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A request with this Idempotency-Key is still in progress")
+
+    def complete(self, key: bytes, fingerprint: bytes, body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, fingerprint, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+            self._release(key)
+
+    def abort(self, key: bytes) -> None:
+        with self._lock:
+            self._release(key)
+
+    def _release(self, key: bytes) -> None:
+        event = self._in_flight.pop(key, None)
+        if event:
+            event.set()
+
+store = IdempotencyStore()
+
+def run_idempotent(idempotency_key: str, scope: str, token: str, request: BaseModel, operation: Callable, status_code: int = 200):
+    if not idempotency_key:
+        return operation()
+
+    # La clave es por usuario y no por token: un reintento tras renovar el token debe repetir
+    # la respuesta guardada, no ejecutar la operacion otra vez
+    user_id = read_access_token(token).id
+    key = hashlib.sha256(f"{scope}\0{user_id}\0{idempotency_key}".encode()).digest()[:16]
+    fingerprint = hashlib.sha256(request.model_dump_json().encode()).digest()[:16]
+
+    body = store.begin(key, fingerprint)
+    if body is not None:
+        return replayed(body, status_code)
+
+    # Solo se guardan las respuestas correctas: tras un error el cliente puede reintentar con la misma clave
+    try:
+        if coordinator.shared:
+            body, replay = run_shared(key, fingerprint, operation)
+        else:
+            body, replay = json.dumps(jsonable_encoder(operation()), separators=(",", ":")).encode(), False
+    except BaseException:
+        store.abort(key)
+        raise
+    store.complete(key, fingerprint, body)
+    if replay:
+        return replayed(body, status_code)
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+def replayed(body: bytes, status_code: int) -> Response:
+    return Response(content=body, status_code=status_code, media_type="application/json", headers={"Idempotent-Replayed": "true"})
+
+def run_shared(key: bytes, fingerprint: bytes, operation: Callable) -> tuple[bytes, bool]:
+    # Con varios procesos: el cerrojo compartido serializa los reintentos concurrentes y la
+    # respuesta se guarda en el coordinador para que cualquier proceso pueda repetirla
+    name = f"idempotency:{key.hex()}"
+    try:
+        with coordinator.lock(name, IDEMPOTENCY_WAIT):
+            value = coordinator.get(name)
+            if value:
+                entry = json.loads(value)
+                if entry["fingerprint"] != fingerprint.hex():
+                    raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Idempotency-Key reused with a different request")
+                return entry["body"].encode(), True
+
+            body = json.dumps(jsonable_encoder(operation()), separators=(",", ":")).encode()
+            coordinator.set(name, json.dumps({"fingerprint": fingerprint.hex(), "body": body.decode()}), IDEMPOTENCY_TTL)
+            return body, False
+    except LockTimeout:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A request with this Idempotency-Key is still in progress")
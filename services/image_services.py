@@ -0,0 +1,218 @@
+# modulos externos
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import os
+import queue
+import shutil
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import select
+
+# modulos internos
+from config.db import get_db, get_read_db
+from models.item_model import items
+from models.item_thumbnail_model import item_thumbnails
+from schemas.auth_schemas import Token
+from services.auth_services import read_access_token
+from services.worker_services import BackgroundWorker, register_worker
+
+logger = logging.getLogger(__name__)
+
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(5 * 1024 * 1024)))
+THUMBNAILS_ENABLED = os.getenv("THUMBNAILS_ENABLED", "true").lower() == "true"
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+
+# Si se define, las miniaturas tambien se escriben en disco para que nginx las sirva directamente
+MEDIA_ROOT = os.getenv("MEDIA_ROOT")
+
+# Lado maximo en pixeles de cada variante
+THUMBNAIL_SIZES = {
+    "small": 160,
+    "medium": 480
+}
+
+# Firmas de los formatos aceptados
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+def _content_type(data: bytes) -> str:
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+def decode_image(img: str) -> tuple[bytes, str]:
+    # Acepta base64 plano o data URL ("data:image/png;base64,...")
+    payload = img.split(",", 1)[1] if img.startswith("data:") else img
+
+    # Base64 ocupa 4/3 del binario: se rechaza antes de decodificar
+    if len(payload) * 3 // 4 > MAX_IMAGE_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Image larger than {MAX_IMAGE_BYTES} bytes")
+
+    try:
+        data = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Image is not valid base64")
+
+    content_type = _content_type(data)
+    if not content_type:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported image format")
+    return data, content_type
+
+def verify_image(data: bytes) -> None:
+    # Decodificacion completa al subir la imagen: un fichero con firma valida pero corrupto
+    # se rechaza aqui y no mas tarde en el worker de miniaturas
+    try:
+        from PIL import Image
+    except ImportError:
+        return
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Image could not be decoded")
+
+def validate_image(img: str) -> None:
+    if img:
+        data, _ = decode_image(img)
+        verify_image(data)
+
+def image_response(request: Request, data: bytes, content_type: str) -> Response:
+    # Las URLs no cambian al actualizar la imagen: no-cache con ETag obliga a revalidar y
+    # la respuesta 304 evita reenviar los bytes si no cambiaron
+    tag = f'"{hashlib.sha1(data).hexdigest()[:20]}"'
+    headers = {"ETag": tag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and any(candidate.strip() in (tag, "*") for candidate in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=data, media_type=content_type, headers=headers)
+
+def thumbnail_url(item_id: int, size: str = "small") -> str:
+    return f"/items/{item_id}/thumbnail/{size}"
+
+def image_url(item_id: int) -> str:
+    return f"/items/{item_id}/image"
+
+def authorize(token: Token) -> None:
+    # Las imagenes exigen sesion igual que el articulo que las contiene
+    if not read_access_token(token).role:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
+
+def get_item_image(item_id: int, token: Token) -> tuple[bytes, str]:
+    authorize(token)
+    with get_read_db(token) as db:
+        img = db.execute(select(items.c.img).where(items.c.id == item_id)).scalar()
+    if not img:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    return decode_image(img)
+
+def get_item_thumbnail(item_id: int, size: str, token: Token):
+    authorize(token)
+    with get_read_db(token) as db:
+        return db.execute(
+            select(item_thumbnails.c.data, item_thumbnails.c.content_type)
+            .where(item_thumbnails.c.item_id == item_id, item_thumbnails.c.size == size)
+        ).first()
+
+def render_thumbnails(data: bytes) -> dict[str, bytes]:
+    # Pillow es opcional: sin el, la API sirve la imagen original como respaldo
+    from PIL import Image
+
+    thumbnails = {}
+    for size, max_side in THUMBNAIL_SIZES.items():
+        with Image.open(io.BytesIO(data)) as image:
+            image.thumbnail((max_side, max_side))
+            output = io.BytesIO()
+            image.convert("RGB").save(output, format="JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+            thumbnails[size] = output.getvalue()
+    return thumbnails
+
+def media_directory(item_id: int) -> str:
+    return os.path.join(MEDIA_ROOT, "items", str(item_id))
+
+def remove_media_files(item_id: int) -> None:
+    # nginx sirve lo que haya en disco: al borrar el articulo tambien se borran sus ficheros
+    if MEDIA_ROOT:
+        shutil.rmtree(media_directory(item_id), ignore_errors=True)
+
+def write_media_files(item_id: int, thumbnails: dict[str, bytes]) -> None:
+    if not thumbnails:
+        # Articulo sin imagen o ya borrado (trabajo encolado antes del borrado)
+        remove_media_files(item_id)
+        return
+    directory = media_directory(item_id)
+    os.makedirs(directory, exist_ok=True)
+    for size in THUMBNAIL_SIZES:
+        path = os.path.join(directory, f"{size}.jpg")
+        if size not in thumbnails:
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+        # Escritura atomica: nginx nunca sirve un fichero a medio escribir
+        with open(path + ".tmp", "wb") as file:
+            file.write(thumbnails[size])
+        os.replace(path + ".tmp", path)
+
+def generate_thumbnails(item_id: int) -> int:
+    thumbnails = {}
+    with get_db() as db:
+        img = db.execute(select(items.c.img).where(items.c.id == item_id)).scalar()
+        db.execute(item_thumbnails.delete().where(item_thumbnails.c.item_id == item_id))
+        if img:
+            data, _ = decode_image(img)
+            thumbnails = render_thumbnails(data)
+            db.execute(item_thumbnails.insert(), [
+                {"item_id": item_id, "size": size, "content_type": "image/jpeg", "data": thumbnail}
+                for size, thumbnail in thumbnails.items()
+            ])
+        db.commit()
+
+    if MEDIA_ROOT:
+        write_media_files(item_id, thumbnails)
+    return 1
+
+class ThumbnailWorker(BackgroundWorker):
+    name = "thumbnails"
+
+    def __init__(self):
+        super().__init__()
+        self.queue = queue.Queue()
+
+    def enqueue(self, item_id: int) -> None:
+        self.queue.put(item_id)
+        self.wake()
+
+    def backlog(self) -> int:
+        return self.queue.qsize()
+
+    def run_once(self) -> int:
+        try:
+            item_id = self.queue.get_nowait()
+        except queue.Empty:
+            return 0
+
+        try:
+            return generate_thumbnails(item_id)
+        except ImportError:
+            logger.warning("Pillow is not installed, thumbnails for item %s skipped", item_id)
+        except HTTPException as e:
+            logger.warning("Invalid image for item %s: %s", item_id, e.detail)
+        except (OSError, ValueError) as e:
+            # UnidentifiedImageError hereda de OSError; las miniaturas anteriores se conservan
+            logger.warning("Image for item %s could not be decoded: %s", item_id, e)
+        return 1
+
+thumbnail_worker = register_worker(ThumbnailWorker(), enabled=THUMBNAILS_ENABLED)
+
+def schedule_thumbnails(item_id: int) -> None:
+    if THUMBNAILS_ENABLED:
+        thumbnail_worker.enqueue(item_id)
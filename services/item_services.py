@@ -6,16 +6,21 @@ from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 
 # modulos internos
-from config.db import get_db
+from config.db import get_db, get_read_db, mark_write
 
 from models.item_model import items
+from models.auction_model import auctions
 
 from schemas.item_schemas import ItemResponse, ItemRequest, ItemUpdate
 from schemas.auth_schemas import Token
 
 from services.auth_services import read_access_token
-from services.category_services import get_category_by_id
-from services.user_services import get_user_by_id
+from services.image_services import validate_image, schedule_thumbnails, thumbnail_url, image_url, remove_media_files
+from services.search_services import search_condition
+from services.sync_services import record_change, record_dependents, DELETE
+from services.loader_services import load_names
+from services.patch_services import changed_values
+from services.cache_services import cached
 
 def get_role(token: Token) -> str:
     token_data = read_access_token(token)
@@ -23,66 +28,89 @@ def get_role(token: Token) -> str:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     return token_data.role
 
-def get_all_items(token: Token) -> list[ItemResponse]:
+def select_item_summaries():
+    # Los listados no traen la imagen (puede ocupar varios MB): solo las URLs de la miniatura y del original
+    columns = [column for column in items.c if column.name != "img"]
+    return select(*columns, items.c.img.isnot(None).label("has_img"))
+
+def load_item_names(db, result) -> dict[str, dict[int, str]]:
+    return load_names(db, categories=[item["category_id"] for item in result], users=[item["user_id"] for item in result])
+
+def item_summary(item, names: dict[str, dict[int, str]]) -> ItemResponse:
+    return ItemResponse(
+        id = item["id"],
+        name = item["name"],
+        description = item["description"],
+        thumbnail_url = thumbnail_url(item["id"]) if item["has_img"] else None,
+        img_url = image_url(item["id"]) if item["has_img"] else None,
+        init_price = item["init_price"],
+        final_price = item["final_price"],
+        category_name = names["categories"].get(item["category_id"]),
+        user_name = names["users"].get(item["user_id"])
+    )
+
+def get_all_items(token: Token, ids: list[int] = None) -> list[ItemResponse]:
 
     role = get_role(token)
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
-    with get_db() as db:
+    with get_read_db(token) as db:
         try:
-            query = select(items)
+            query = select_item_summaries()
+            if ids is not None:
+                query = query.where(items.c.id.in_(ids))
             result = db.execute(query).mappings().all()
-            items_db = []
-
-            for item in result:
-                category = get_category_by_id(item["category_id"], token)
-                user = get_user_by_id(item["user_id"]) if item["user_id"] else None
-                item_db = ItemResponse(
-                    id = item["id"],
-                    name = item["name"],
-                    description = item["description"],
-                    img = item["img"],
-                    init_price = item["init_price"],
-                    final_price = item["final_price"],
-                    category_name = category.name,
-                    user_name = user.name if user else None
-                )
-                items_db.append(item_db)
-
-            return items_db
+            names = load_item_names(db, result)
+            return [item_summary(item, names) for item in result]
     
         except SQLAlchemyError as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
     
-def get_item_by_id(id: int, token: Token) -> ItemResponse:
+def search_items(q: str, limit: int, offset: int, token: Token) -> list[ItemResponse]:
 
     role = get_role(token)
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
+    with get_read_db(token) as db:
+        try:
+            condition, relevance = search_condition(db, [items.c.name, items.c.description], q)
+            query = select_item_summaries().where(condition).order_by(relevance, items.c.id).limit(limit).offset(offset)
+            result = db.execute(query).mappings().all()
+            names = load_item_names(db, result)
+            return [item_summary(item, names) for item in result]
+    
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
+
+def fetch_item(id: int) -> ItemResponse:
+    # Lectura para la cache, siempre del primario como fetch_auction. Sin la imagen (puede ocupar
+    # varios MB por entrada): los clientes la piden a /items/{id}/image
     with get_db() as db:
         try:
-            query = select(items).where(items.c.id == id)
-            result = db.execute(query).mappings().fetchone()
-            item_db = ItemResponse(
-                id = result["id"],
-                name = result["name"],
-                description = result["description"],
-                img = result["img"],
-                init_price = result["init_price"],
-                final_price = result["final_price"],
-                category_name = get_category_by_id(result["category_id"], token).name,
-                user_name = get_user_by_id(result["user_id"]).name if result["user_id"] else None
-            )
-            return item_db
+            result = db.execute(select_item_summaries().where(items.c.id == id)).mappings().fetchone()
+            if not result:
+                return None
+            return item_summary(result, load_item_names(db, [result]))
     
         except SQLAlchemyError as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
 
+def get_item_by_id(id: int, token: Token) -> ItemResponse:
+
+    role = get_role(token)
+    if not role:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
+    
+    item_db = cached("items", id, lambda: fetch_item(id))
+    if not item_db:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    return item_db
+
 def get_item_id_by_name(name: str) -> int:
     
-    with get_db() as db:
+    with get_read_db() as db:
         try:
             query = select(items).where(items.c.name == name)
             result = db.execute(query).mappings().fetchone()
@@ -96,6 +124,8 @@ def create_item(item: ItemRequest, token: Token) -> ItemResponse:
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
+    validate_image(item.img)
+
     with get_db() as db:
         try:
             query = items.insert().values(
@@ -108,21 +138,25 @@ def create_item(item: ItemRequest, token: Token) -> ItemResponse:
                 category_id = item.category_id,
                 user_id = item.user_id
             )
-            db.execute(query)
+            item_id = db.execute(query).inserted_primary_key[0]
+            record_change(db, "items", item_id)
+            names = load_names(db, categories=[item.category_id], users=[item.user_id])
             db.commit()
-
-            query2 = select(items).where(items.c.name == item.name)
-            item_db = db.execute(query2).fetchone()
+            mark_write(token)
+            if item.img:
+                schedule_thumbnails(item_id)
 
             item_db = ItemResponse(
-                id = item_db.id,
+                id = item_id,
                 name = item.name,
                 description = item.description,
                 img = item.img,
+                thumbnail_url = thumbnail_url(item_id) if item.img else None,
+                img_url = image_url(item_id) if item.img else None,
                 init_price = item.init_price,
-                final_price = item_db.final_price,
-                category_name = get_category_by_id(item.category_id, token).name,
-                user_name = get_user_by_id(item.user_id).name if item.user_id else None
+                final_price = item.init_price,
+                category_name = names["categories"].get(item.category_id),
+                user_name = names["users"].get(item.user_id)
             )
             return item_db
     
@@ -136,27 +170,35 @@ def update_item(id: int, item: ItemUpdate, token: Token) -> ItemResponse:
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
+    # Sin lectura previa: el UPDATE solo lleva las columnas enviadas, y la imagen solo viaja si cambia
+    values = changed_values(item, items, ItemResponse)
+    validate_image(values.get("img"))
+
     with get_db() as db:
         try:
-            item_db = db.execute(select(items).where(items.c.id == id)).mappings().fetchone()
+            if values:
+                result = db.execute(items.update().where(items.c.id == id).values(values))
+                if result.rowcount == 0:
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+                record_change(db, "items", id)
+                if "name" in values:
+                    record_dependents(db, "auctions", auctions.c.id, auctions.c.item_id == id)
+
+            item_db = db.execute(select_item_summaries().where(items.c.id == id)).mappings().first()
             if not item_db:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
-    
-            item_updated = {
-                "name": item.name if item.name else item_db["name"],
-                "description": item.description if item.description else item_db["description"],
-            "img": item.img if item.img else item_db["img"],
-            "final_price": item.final_price if item.final_price else item_db["final_price"],
-            "category_id": item.category_id if item.category_id else item_db["category_id"],
-            "user_id": item.user_id if item.user_id else item_db["user_id"]
-        }
-            query = items.update().where(items.c.id == id).values(item_updated)
-            db.execute(query)
+            names = load_item_names(db, [item_db])
+            # La respuesta se valida antes del commit: una fila que no la cumple no se guarda
+            item_response = item_summary(item_db, names)
             db.commit()
-            return get_item_by_id(id, token)
+            mark_write(token)
+            if "img" in values:
+                schedule_thumbnails(id)
+            return item_response
     
-        except Exception as e:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Item not updated")
+        except SQLAlchemyError as e:
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
 
 def delete_item_by_id(id: int, token: Token) -> None:
 
@@ -168,8 +210,13 @@ def delete_item_by_id(id: int, token: Token) -> None:
         try:
             query = items.delete().where(items.c.id == id)
 
-            db.execute(query)
+            result = db.execute(query)
+            if result.rowcount:
+                record_change(db, "items", id, DELETE)
             db.commit()
+            mark_write(token)
+            if result.rowcount:
+                remove_media_files(id)
         
         except SQLAlchemyError as e:
             db.rollback()
@@ -0,0 +1,61 @@
+# modulos externos
+import os
+from contextvars import ContextVar
+from typing import Iterable
+
+from sqlalchemy import event, select
+
+# modulos internos
+from config.db import SessionLocal
+from models.user_model import users
+from models.category_model import categories
+from models.item_model import items
+from models.auction_model import auctions
+
+LOADER_BATCH_SIZE = int(os.getenv("LOADER_BATCH_SIZE", "500"))
+
+# Entidades cuyo nombre aparece en las respuestas (category_name, user_name, item_name, auction_name)
+NAME_TABLES = {
+    "users": users,
+    "categories": categories,
+    "items": items,
+    "auctions": auctions
+}
+
+class NameLoader:
+    # Cache id -> nombre por entidad; cada llamada a load resuelve los ids que faltan con
+    # un solo SELECT ... WHERE id IN (...) por entidad
+    def __init__(self):
+        self.names = {entity: {} for entity in NAME_TABLES}
+
+    def load(self, db, **wanted: Iterable[int]) -> dict[str, dict[int, str]]:
+        # Devuelve solo los ids pedidos: la cache puede vaciarse con un commit posterior
+        found = {}
+        for entity, ids in wanted.items():
+            cache = self.names[entity]
+            ids = {id for id in ids if id is not None}
+            missing = sorted(ids - cache.keys())
+            table = NAME_TABLES[entity]
+            for start in range(0, len(missing), LOADER_BATCH_SIZE):
+                chunk = missing[start:start + LOADER_BATCH_SIZE]
+                cache.update(db.execute(select(table.c.id, table.c.name).where(table.c.id.in_(chunk))).all())
+            found[entity] = {id: cache[id] for id in ids if id in cache}
+        return found
+
+    def clear(self) -> None:
+        for cache in self.names.values():
+            cache.clear()
+
+current_loader: ContextVar[NameLoader] = ContextVar("name_loader", default=None)
+
+def load_names(db, **wanted: Iterable[int]) -> dict[str, dict[int, str]]:
+    # Fuera de una peticion (workers, scripts) se usa un loader de un solo uso
+    loader = current_loader.get() or NameLoader()
+    return loader.load(db, **wanted)
+
+# Tras un commit los nombres pueden haber cambiado: la siguiente lectura vuelve a la base de datos
+@event.listens_for(SessionLocal, "after_commit")
+def clear_names(session) -> None:
+    loader = current_loader.get()
+    if loader:
+        loader.clear()
@@ -0,0 +1,111 @@
+# modulos externos
+from fastapi import HTTPException, status
+from sqlalchemy import select, func
+from sqlalchemy.exc import SQLAlchemyError
+
+# modulos internos
+from config.db import get_read_db
+from models.auction_model import auctions
+from models.bid_model import bids
+from models.item_model import items
+from models.payment_model import payments
+from schemas.auction_schemas import AuctionState
+from schemas.me_schemas import MyBidSummary, WinningAuction
+from schemas.payment_schemas import PaymentResponse
+from schemas.auth_schemas import Token
+from services.auth_services import read_access_token
+
+def get_my_bids(token: Token) -> list[MyBidSummary]:
+    user = read_access_token(token)
+    
+    with get_read_db(token) as db:
+        try:
+            # Una fila por subasta en la que ha pujado el usuario (indice bids(user_id, auction_id))
+            query = (
+                select(
+                    bids.c.auction_id,
+                    auctions.c.name.label("auction_name"),
+                    auctions.c.state.label("auction_state"),
+                    auctions.c.end_date,
+                    func.count(bids.c.id).label("bids_count"),
+                    func.sum(bids.c.amount).label("total_amount"),
+                    func.max(bids.c.amount).label("max_amount"),
+                    func.max(bids.c.date).label("last_bid_date"),
+                    items.c.user_id.label("leader_id")
+                )
+                .join(auctions, auctions.c.id == bids.c.auction_id)
+                .join(items, items.c.id == auctions.c.item_id)
+                .where(bids.c.user_id == user.id)
+                .group_by(bids.c.auction_id, auctions.c.name, auctions.c.state, auctions.c.end_date, items.c.user_id)
+                .order_by(func.max(bids.c.date).desc())
+            )
+            result = db.execute(query).mappings().all()
+            return [
+                MyBidSummary(
+                    auction_id = row["auction_id"],
+                    auction_name = row["auction_name"],
+                    auction_state = row["auction_state"],
+                    end_date = row["end_date"],
+                    bids_count = row["bids_count"],
+                    total_amount = row["total_amount"],
+                    max_amount = row["max_amount"],
+                    last_bid_date = row["last_bid_date"],
+                    winning = row["leader_id"] == user.id
+                ) for row in result
+            ]
+
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
+
+def get_my_winning_auctions(token: Token) -> list[WinningAuction]:
+    user = read_access_token(token)
+    
+    with get_read_db(token) as db:
+        try:
+            # create_bid deja en items.user_id al autor de la ultima puja
+            query = (
+                select(
+                    auctions.c.id.label("auction_id"),
+                    auctions.c.name.label("auction_name"),
+                    auctions.c.state,
+                    auctions.c.end_date,
+                    items.c.id.label("item_id"),
+                    items.c.name.label("item_name"),
+                    items.c.final_price
+                )
+                .join(items, items.c.id == auctions.c.item_id)
+                .where(items.c.user_id == user.id, auctions.c.state == AuctionState.active.value)
+                .order_by(auctions.c.end_date)
+            )
+            result = db.execute(query).mappings().all()
+            return [WinningAuction(**row) for row in result]
+
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
+
+def get_my_payments(token: Token) -> list[PaymentResponse]:
+    user = read_access_token(token)
+    
+    with get_read_db(token) as db:
+        try:
+            query = (
+                select(payments, items.c.name.label("item_name"))
+                .join(items, items.c.id == payments.c.item_id)
+                .where(payments.c.user_id == user.id)
+                .order_by(payments.c.date.desc())
+            )
+            result = db.execute(query).mappings().all()
+            return [
+                PaymentResponse(
+                    id = payment["id"],
+                    amount = payment["amount"],
+                    method = payment["method"],
+                    date = payment["date"],
+                    state = payment["state"],
+                    item_name = payment["item_name"],
+                    user_name = user.name
+                ) for payment in result
+            ]
+
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
@@ -0,0 +1,85 @@
+# modulos externos
+import enum
+import logging
+from datetime import datetime, timezone
+from decimal import Decimal
+from functools import lru_cache
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_ACCEPTED = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+
+@lru_cache(maxsize=1)
+def msgpack_module():
+    # msgpack es opcional: sin el paquete todas las respuestas siguen en JSON
+    try:
+        import msgpack
+    except ImportError:
+        logger.warning("msgpack is not installed, application/msgpack requests are answered with JSON")
+        return None
+    return msgpack
+
+def media_quality(accept: str) -> dict[str, float]:
+    qualities = {}
+    for part in accept.split(","):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        qualities[media_type.lower()] = quality
+    return qualities
+
+def wants_msgpack(request: Request) -> bool:
+    # MessagePack solo si el cliente lo pide expresamente y no prefiere JSON; */* sigue siendo JSON
+    accept = request.headers.get("accept")
+    if not accept or "msgpack" not in accept:
+        return False
+    qualities = media_quality(accept)
+    msgpack_quality = max(qualities.get(media_type, 0.0) for media_type in MSGPACK_ACCEPTED)
+    return msgpack_quality > 0 and msgpack_quality >= qualities.get("application/json", 0.0) and msgpack_module() is not None
+
+def wire_default(value):
+    # Fechas con la extension timestamp de MessagePack (segundos y nanosegundos desde epoch);
+    # las fechas sin zona horaria se guardan en UTC
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return msgpack_module().Timestamp.from_datetime(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__} to msgpack")
+
+def packb(content) -> bytes:
+    return msgpack_module().packb(content, default=wire_default, datetime=False)
+
+def render(request: Request, content, status_code: int = 200, headers: dict = None) -> Response:
+    headers = {**(headers or {}), "Vary": "Accept"}
+    if wants_msgpack(request):
+        return Response(content=packb(content), status_code=status_code, media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return JSONResponse(jsonable_encoder(content), status_code=status_code, headers=headers)
+
+def render_stored(request: Request, response: Response, model: type[BaseModel]) -> Response:
+    # Las respuestas idempotentes se guardan en JSON: se vuelven a validar con su esquema para
+    # recuperar las fechas antes de convertirlas
+    if not wants_msgpack(request):
+        return response
+    converted = render(request, model.model_validate_json(response.body), response.status_code)
+    converted.headers.update({
+        name: value for name, value in response.headers.items()
+        if name not in ("content-length", "content-type")
+    })
+    return converted
@@ -0,0 +1,225 @@
+# modulos externos
+import json
+import logging
+import os
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from typing import Callable
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, select, or_
+
+# modulos internos
+from config.db import get_db, SessionLocal
+from models.outbox_model import outbox_events
+from services.worker_services import BackgroundWorker, register_worker
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() == "true"
+OUTBOX_INTERVAL = float(os.getenv("OUTBOX_INTERVAL", "2"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_WEBHOOK_URL = os.getenv("OUTBOX_WEBHOOK_URL")
+OUTBOX_WEBHOOK_TIMEOUT = float(os.getenv("OUTBOX_WEBHOOK_TIMEOUT", "5"))
+# Los eventos entregados se borran pasadas estas horas; los que agotaron los intentos se conservan
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "24"))
+OUTBOX_PURGE_INTERVAL = float(os.getenv("OUTBOX_PURGE_INTERVAL", "300"))
+OUTBOX_CLAIM_TIMEOUT = float(os.getenv("OUTBOX_CLAIM_TIMEOUT", "300"))
+
+_subscribers: dict[str, list[Callable[[dict], None]]] = {}
+_projections: dict[str, list[Callable]] = {}
+
+def subscribe(event_type: str, handler: Callable[[dict], None]) -> None:
+    # Entrega al menos una vez: los suscriptores deben tolerar eventos repetidos
+    _subscribers.setdefault(event_type, []).append(handler)
+
+def project(event_type: str, handler: Callable) -> None:
+    # Las proyecciones reciben (db, eventos) y escriben en la transaccion que marca los eventos
+    # como entregados: cada evento se aplica una sola vez y fuera de la transaccion de escritura
+    _projections.setdefault(event_type, []).append(handler)
+
+def apply_projections(db, events: list[dict]) -> None:
+    by_type = {}
+    for outbox_event in events:
+        by_type.setdefault(outbox_event["event_type"], []).append(outbox_event)
+    for event_type, typed_events in by_type.items():
+        for handler in _projections.get(event_type, []):
+            handler(db, typed_events)
+
+def add_event(db, event_type: str, aggregate_id: int, payload: dict) -> None:
+    # Sin relay nadie entregaria ni borraria la fila; las proyecciones se aplican en la
+    # transaccion del llamador
+    if not OUTBOX_ENABLED:
+        apply_projections(db, [{
+            "event_type": event_type,
+            "aggregate_id": aggregate_id,
+            "payload": jsonable_encoder(payload),
+            "created_at": datetime.now().isoformat()
+        }])
+        return
+    # Se inserta en la misma sesion que el cambio de dominio, asi se confirma (o se deshace) con el
+    db.execute(outbox_events.insert().values(
+        event_type = event_type,
+        aggregate_id = aggregate_id,
+        payload = json.dumps(jsonable_encoder(payload)),
+        created_at = datetime.now()
+    ))
+    db.info["outbox_pending"] = True
+
+def post_webhook(events: list[dict]) -> None:
+    request = urllib.request.Request(
+        OUTBOX_WEBHOOK_URL,
+        data=json.dumps(events).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=OUTBOX_WEBHOOK_TIMEOUT) as response:
+        response.read()
+
+class OutboxRelay(BackgroundWorker):
+    name = "outbox"
+    interval = OUTBOX_INTERVAL
+
+    def __init__(self):
+        super().__init__()
+        self.pending = 0
+        self.last_purge = 0.0
+
+    def backlog(self) -> int:
+        return self.pending
+
+    def purge_dispatched(self, db) -> int:
+        # Por lotes y sin DELETE ... LIMIT (no es portable); usa el indice (dispatched_at, id)
+        cutoff = datetime.now() - timedelta(hours=OUTBOX_RETENTION_HOURS)
+        ids = db.execute(
+            select(outbox_events.c.id)
+            .where(outbox_events.c.dispatched_at < cutoff)
+            .order_by(outbox_events.c.dispatched_at)
+            .limit(OUTBOX_BATCH_SIZE)
+        ).scalars().all()
+        if ids:
+            db.execute(outbox_events.delete().where(outbox_events.c.id.in_(ids)))
+        db.commit()
+        # Mientras queden lotes completos se sigue borrando en la siguiente pasada
+        if len(ids) < OUTBOX_BATCH_SIZE:
+            self.last_purge = time.monotonic()
+        return len(ids)
+
+    def claim(self, db) -> tuple[list[dict], datetime]:
+        # Reclama el lote y confirma enseguida, como la liquidacion de pagos: los INSERT del
+        # outbox en create_bid no esperan a un webhook lento. Un reclamo abandonado se repite
+        # pasado OUTBOX_CLAIM_TIMEOUT. Sin microsegundos: DATETIME de MySQL los descarta
+        claimed_at = datetime.now().replace(microsecond=0)
+        rows = db.execute(
+            select(outbox_events)
+            .where(
+                outbox_events.c.dispatched_at.is_(None),
+                outbox_events.c.attempts < OUTBOX_MAX_ATTEMPTS,
+                or_(outbox_events.c.claimed_at.is_(None), outbox_events.c.claimed_at < claimed_at - timedelta(seconds=OUTBOX_CLAIM_TIMEOUT))
+            )
+            .order_by(outbox_events.c.id)
+            .limit(OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        ).mappings().all()
+        if rows:
+            db.execute(outbox_events.update().where(outbox_events.c.id.in_([row["id"] for row in rows])).values(claimed_at=claimed_at))
+        db.commit()
+        return [
+            {
+                "id": row["id"],
+                "event_type": row["event_type"],
+                "aggregate_id": row["aggregate_id"],
+                "payload": json.loads(row["payload"]),
+                "created_at": row["created_at"].isoformat() if row["created_at"] else None
+            } for row in rows
+        ], claimed_at
+
+    def deliver(self, events: list[dict]) -> tuple[list[dict], list[dict]]:
+        # Si el lote falla se reintenta evento a evento: uno defectuoso no retiene a los demas
+        try:
+            self.dispatch(events)
+            return events, []
+        except Exception as e:
+            logger.warning("Outbox dispatch failed for %s events: %s", len(events), e)
+            if len(events) == 1:
+                return [], events
+        delivered, failed = [], []
+        for outbox_event in events:
+            try:
+                self.dispatch([outbox_event])
+                delivered.append(outbox_event)
+            except Exception as e:
+                logger.warning("Outbox dispatch failed for event %s: %s", outbox_event["id"], e)
+                failed.append(outbox_event)
+        return delivered, failed
+
+    def complete(self, db, events: list[dict], claimed_at: datetime) -> list[dict]:
+        # Proyecciones y marca de entregado en la misma transaccion: cada evento se proyecta una
+        # vez. Si otro relay reclamo el lote (reclamo caducado) no se aplica nada
+        if not events:
+            return []
+        try:
+            apply_projections(db, events)
+            result = db.execute(
+                outbox_events.update()
+                .where(outbox_events.c.id.in_([outbox_event["id"] for outbox_event in events]), outbox_events.c.claimed_at == claimed_at)
+                .values(dispatched_at=datetime.now(), claimed_at=None)
+            )
+            if result.rowcount != len(events):
+                db.rollback()
+                return []
+            db.commit()
+            return events
+        except Exception:
+            db.rollback()
+            raise
+
+    def dispatch(self, events: list[dict]) -> None:
+        if OUTBOX_WEBHOOK_URL:
+            post_webhook(events)
+        for outbox_event in events:
+            for handler in _subscribers.get(outbox_event["event_type"], []):
+                handler(outbox_event)
+
+    def run_once(self) -> int:
+        with get_db() as db:
+            purged = 0
+            if time.monotonic() - self.last_purge >= OUTBOX_PURGE_INTERVAL:
+                purged = self.purge_dispatched(db)
+
+            events, claimed_at = self.claim(db)
+            self.pending = len(events)
+            if not events:
+                return purged
+
+            # La entrega (webhook, suscriptores) ocurre sin filas bloqueadas
+            delivered, failed = self.deliver(events)
+            try:
+                done = self.complete(db, delivered, claimed_at)
+            except Exception as e:
+                logger.warning("Outbox projections failed for %s events, retrying one by one: %s", len(delivered), e)
+                done = []
+                for outbox_event in delivered:
+                    try:
+                        done += self.complete(db, [outbox_event], claimed_at)
+                    except Exception as e:
+                        logger.warning("Outbox projection failed for event %s: %s", outbox_event["id"], e)
+                        failed.append(outbox_event)
+
+            if failed:
+                db.execute(
+                    outbox_events.update()
+                    .where(outbox_events.c.id.in_([outbox_event["id"] for outbox_event in failed]), outbox_events.c.claimed_at == claimed_at)
+                    .values(attempts=outbox_events.c.attempts + 1, claimed_at=None)
+                )
+                db.commit()
+            return len(done)
+
+outbox_relay = register_worker(OutboxRelay(), enabled=OUTBOX_ENABLED)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _wake_relay(session) -> None:
+    if session.info.pop("outbox_pending", False):
+        outbox_relay.wake()
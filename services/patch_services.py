@@ -0,0 +1,20 @@
+# modulos externos
+from pydantic import BaseModel
+from sqlalchemy import Table
+
+def nullable(name: str, table: Table, response: type[BaseModel]) -> bool:
+    # Una columna solo se vacia si la respuesta la admite vacia: items.final_price es NULL en la
+    # tabla pero obligatorio en ItemResponse (y en create_bid)
+    field = response.model_fields.get(name)
+    if field is not None and field.is_required():
+        return False
+    return table.c[name].nullable
+
+def changed_values(update: BaseModel, table: Table, response: type[BaseModel]) -> dict:
+    # Solo los campos enviados en la peticion. Un null explicito vacia las columnas opcionales;
+    # en las obligatorias se ignora, como hacia la version anterior que fusionaba con la fila
+    values = update.model_dump(exclude_unset=True)
+    return {
+        name: value for name, value in values.items()
+        if value is not None or nullable(name, table, response)
+    }
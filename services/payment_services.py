@@ -7,16 +7,20 @@ from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 
 # modulos internos
-from config.db import get_db
+from config.db import get_db, get_read_db, mark_write
 
 from models.payment_model import payments
+from models.archive_model import payments_archive
+from models.item_model import items
+from models.user_model import users
 
-from schemas.payment_schemas import PaymentResponse, PaymentRequest, PaymentUpdate
+from schemas.payment_schemas import PaymentResponse, PaymentRequest, PaymentUpdate, PaymentState
 from schemas.auth_schemas import Token
 
 from services.auth_services import read_access_token
-from services.item_services import get_item_by_id
-from services.user_services import get_user_by_id
+from services.settlement_services import PAYMENT_DEFAULT_METHOD
+from services.stats_services import record_payment_created, record_payment_state
+from services.loader_services import load_names
 
 def get_role(token: Token) -> str:
     token_data = read_access_token(token)
@@ -24,17 +28,22 @@ def get_role(token: Token) -> str:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     return token_data.role
 
-def get_all_payments(token: Token) -> list[PaymentResponse]:
+def get_all_payments(token: Token, archived: bool = False) -> list[PaymentResponse]:
 
     role = get_role(token)
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
-    with get_db() as db:
+    with get_read_db(token) as db:
         try:
             query = select(payments)
+            if archived:
+                # El historico no guarda claimed_at (solo tiene sentido mientras se cobra)
+                columns = [column.name for column in payments.c if column.name in payments_archive.c]
+                query = select(*(payments.c[name] for name in columns)).union_all(select(*(payments_archive.c[name] for name in columns)))
 
             result = db.execute(query).mappings().fetchall()
+            names = load_names(db, items=[payment["item_id"] for payment in result], users=[payment["user_id"] for payment in result])
             payments_db = []
 
             for payment in result:
@@ -44,8 +53,8 @@ def get_all_payments(token: Token) -> list[PaymentResponse]:
                     method = payment["method"],
                     date = payment["date"],
                     state = payment["state"],
-                    item_name = get_item_by_id(payment["item_id"], token).name,
-                    user_name = get_user_by_id(payment["user_id"]).name
+                    item_name = names["items"].get(payment["item_id"]),
+                    user_name = names["users"].get(payment["user_id"])
                 )
                 payments_db.append(payment_db)
 
@@ -54,25 +63,30 @@ def get_all_payments(token: Token) -> list[PaymentResponse]:
         except SQLAlchemyError as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
     
-def get_payment_by_id(id: int, token: Token) -> PaymentResponse:
+def get_payment_by_id(id: int, token: Token, archived: bool = False) -> PaymentResponse:
 
     role = get_role(token)
     if not role:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
-    with get_db() as db:
+    with get_read_db(token) as db:
         try:
     
             query = select(payments).where(payments.c.id == id)
             result = db.execute(query).mappings().fetchone()
+            if not result and archived:
+                result = db.execute(select(payments_archive).where(payments_archive.c.id == id)).mappings().fetchone()
+            if not result:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payment not found")
+            names = load_names(db, items=[result["item_id"]], users=[result["user_id"]])
             payment_db = PaymentResponse(
                 id = result["id"],
                 amount = result["amount"],
                 method = result["method"],
                 date = result["date"],
                 state = result["state"],
-                item_name = get_item_by_id(result["item_id"], token).name,
-                user_name = get_user_by_id(result["user_id"]).name
+                item_name = names["items"].get(result["item_id"]),
+                user_name = names["users"].get(result["user_id"])
             )
             return payment_db
 
@@ -87,26 +101,35 @@ def create_payment(payment: PaymentRequest, token: Token) -> PaymentResponse:
     
     with get_db() as db:
         try:
-            item = get_item_by_id(payment.item_id, token)
+            item = db.execute(select(items.c.name, items.c.final_price, items.c.category_id).where(items.c.id == payment.item_id)).first()
+            if not item:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+            user_name = db.execute(select(users.c.name).where(users.c.id == payment.user_id)).scalar()
+            if not user_name:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+            payment_date = datetime.now()
     
             query = payments.insert().values(
                 amount = item.final_price,
-                method = "PAYPAL",
-                date = datetime.now(),
-                state = "PENDING",
+                method = PAYMENT_DEFAULT_METHOD,
+                date = payment_date,
+                state = PaymentState.pending.value,
                 item_id = payment.item_id,
                 user_id = payment.user_id
             )
-            db.execute(query)
+            result = db.execute(query)
+            record_payment_created(db, item.category_id)
             db.commit()
+            mark_write(token)
 
             payment_response = PaymentResponse(
+                id = result.inserted_primary_key[0],
                 amount = item.final_price,
-                method = "PAYPAL",
-                date = datetime.now(),
-                state = "PENDING",
-                item_name = get_item_by_id(payment.item_id, token).name,
-                user_name = get_user_by_id(payment.user_id).name
+                method = PAYMENT_DEFAULT_METHOD,
+                date = payment_date,
+                state = PaymentState.pending.value,
+                item_name = item.name,
+                user_name = user_name
             )
             return payment_response
 
@@ -129,21 +152,35 @@ def update_payment(id: int, payment: PaymentUpdate, token: Token) -> PaymentResp
     
             amount = None
             if payment.item_id:
-                amount = get_item_by_id(payment.item_id, token).final_price
-    
+                amount = db.execute(select(items.c.final_price).where(items.c.id == payment.item_id)).scalar()
+                if amount is None:
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
     
             payment_updated = {
-                "amount": payment.amount if amount else payment_db.amount,
-                "date": payment.date if payment.date else payment_db.date,
-                "state": payment.state if payment.state else payment_db.state,
-                "item_id": payment.item_id if payment.item_id else payment_db.item_id,
-                "user_id": payment.user_id if payment.user_id else payment_db.user_id
+                "amount": amount if amount is not None else payment_db["amount"],
+                "date": payment.date if payment.date else payment_db["date"],
+                "state": payment.state if payment.state else payment_db["state"],
+                "item_id": payment.item_id if payment.item_id else payment_db["item_id"],
+                "user_id": payment.user_id if payment.user_id else payment_db["user_id"]
             }
             query = payments.update().where(payments.c.id == id).values(payment_updated)
             
             db.execute(query)
+            if payment_updated["state"] != payment_db["state"]:
+                category_id = db.execute(select(items.c.category_id).where(items.c.id == payment_updated["item_id"])).scalar()
+                record_payment_state(db, category_id, payment_updated["amount"], payment_db["state"], payment_updated["state"])
+            names = load_names(db, items=[payment_updated["item_id"]], users=[payment_updated["user_id"]])
             db.commit()
-            return get_payment_by_id(id, token)
+            mark_write(token)
+            return PaymentResponse(
+                id = id,
+                amount = payment_updated["amount"],
+                method = payment_db["method"],
+                date = payment_updated["date"],
+                state = payment_updated["state"],
+                item_name = names["items"].get(payment_updated["item_id"]),
+                user_name = names["users"].get(payment_updated["user_id"])
+            )
     
         except SQLAlchemyError as e:
             db.rollback()
@@ -161,6 +198,7 @@ def delete_payment_by_id(id: int, token: Token) -> None:
 
             db.execute(query)
             db.commit()
+            mark_write(token)
     
         except SQLAlchemyError as e:
             db.rollback()
@@ -0,0 +1,80 @@
+# modulos externos
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, and_, or_
+
+# modulos internos
+from config.db import get_read_db
+from models.auction_model import auctions
+from models.item_model import items
+from schemas.auction_schemas import AuctionState
+from services.worker_services import BackgroundWorker, register_worker
+from services.cache_services import CACHE_ENABLED, read_cache, cache_key
+from services.auction_services import fetch_auction
+from services.item_services import fetch_item
+from services.category_services import fetch_category
+from services.bid_services import fetch_top_bids
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "30"))
+PREFETCH_WINDOW = float(os.getenv("PREFETCH_WINDOW", "300"))
+PREFETCH_MAX_AUCTIONS = int(os.getenv("PREFETCH_MAX_AUCTIONS", "200"))
+
+def upcoming_auctions(db, now: datetime, window: timedelta) -> list:
+    # Subastas que empiezan o terminan dentro de la ventana: los picos de trafico siguen a esas horas
+    return db.execute(
+        select(auctions.c.id, auctions.c.item_id, items.c.category_id)
+        .join(items, items.c.id == auctions.c.item_id)
+        .where(
+            auctions.c.state != AuctionState.finished.value,
+            or_(
+                and_(auctions.c.start_date >= now, auctions.c.start_date <= now + window),
+                and_(auctions.c.end_date >= now, auctions.c.end_date <= now + window)
+            )
+        )
+        .order_by(auctions.c.id)
+        .limit(PREFETCH_MAX_AUCTIONS)
+    ).all()
+
+class PrefetchWorker(BackgroundWorker):
+    # Recarga en cada pasada la subasta, su articulo, su categoria y sus pujas mas altas, asi
+    # las entradas siguen vigentes cuando llega el pico. Cada proceso calienta su propia cache
+    name = "prefetch"
+    interval = PREFETCH_INTERVAL
+
+    def __init__(self):
+        super().__init__()
+        self.warmed = 0
+
+    def run_once(self) -> int:
+        # Las fechas se guardan sin zona horaria y en UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        with get_read_db() as db:
+            upcoming = upcoming_auctions(db, now, timedelta(seconds=PREFETCH_WINDOW))
+
+        self.warmed = 0
+        for auction in upcoming:
+            loads = [
+                ("auctions", auction.id, fetch_auction),
+                ("items", auction.item_id, fetch_item),
+                ("categories", auction.category_id, fetch_category),
+                ("top_bids", auction.id, fetch_top_bids),
+            ]
+            for entity, id, fetch in loads:
+                if id is None:
+                    continue
+                if read_cache.refresh(cache_key(entity, id), lambda: fetch(id)):
+                    self.warmed += 1
+        if upcoming:
+            logger.debug("Prefetched %s cache entries for %s auctions", self.warmed, len(upcoming))
+        # Siempre 0: el worker espera PREFETCH_INTERVAL entre pasadas
+        return 0
+
+    def status(self) -> dict:
+        return {**super().status(), "warmed": self.warmed, "cache": read_cache.status()}
+
+prefetch_worker = register_worker(PrefetchWorker(), enabled=PREFETCH_ENABLED and CACHE_ENABLED)
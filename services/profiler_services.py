@@ -0,0 +1,86 @@
+# modulos externos
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from fastapi import HTTPException, status
+
+# modulos internos
+from schemas.auth_schemas import Token
+from services.user_services import is_admin
+
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "30"))
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", "0.005"))
+PROFILER_MAX_DEPTH = int(os.getenv("PROFILER_MAX_DEPTH", "128"))
+
+# Hilos parados esperando trabajo (pool de hilos, workers, selector del bucle de eventos): por
+# defecto no se cuentan para que el resultado muestre solo donde se gasta CPU
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+_running = threading.Lock()
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def collect_stack(frame) -> tuple[list[str], bool]:
+    leaf = frame.f_code
+    idle = (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES
+    stack = []
+    while frame is not None and len(stack) < PROFILER_MAX_DEPTH:
+        stack.append(frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack, idle
+
+def sample(seconds: float, interval: float, include_idle: bool) -> Counter:
+    # Muestreo estadistico con sys._current_frames(): no instrumenta las funciones, solo lee las
+    # pilas de todos los hilos cada `interval` segundos, asi el coste no depende de la carga
+    own_thread = threading.get_ident()
+    names = {}
+    stacks = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frames = sys._current_frames()
+        if len(names) != len(frames):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in frames.items():
+            if thread_id == own_thread:
+                continue
+            stack, idle = collect_stack(frame)
+            if idle and not include_idle:
+                continue
+            thread_name = names.get(thread_id, str(thread_id)).split("_")[0]
+            stacks[";".join([thread_name] + stack)] += 1
+        del frames
+        time.sleep(interval)
+    return stacks
+
+def run_profile(seconds: float, include_idle: bool, token: Token) -> str:
+    # Deshabilitado por defecto: se responde 404 para no revelar que existe
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not is_admin(token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
+    if seconds > PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"seconds must be at most {PROFILER_MAX_SECONDS}")
+
+    # Un solo perfil a la vez por proceso
+    if not _running.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+    try:
+        stacks = sample(seconds, PROFILER_INTERVAL, include_idle)
+    finally:
+        _running.release()
+
+    # Formato "collapsed" de flamegraph.pl / speedscope: una pila por linea seguida del numero de muestras
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
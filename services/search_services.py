@@ -0,0 +1,16 @@
+# modulos externos
+from sqlalchemy import or_
+from sqlalchemy.dialects.mysql import match
+
+# InnoDB no indexa palabras mas cortas que innodb_ft_min_token_size (3 por defecto)
+FULLTEXT_MIN_LENGTH = 3
+
+def search_condition(db, columns: list, q: str) -> tuple:
+    # Devuelve (condicion WHERE, orden por relevancia) para buscar `q` en `columns`
+    if db.get_bind().dialect.name == "mysql" and len(q) >= FULLTEXT_MIN_LENGTH:
+        score = match(*columns, against=q).in_natural_language_mode()
+        return score, score.desc()
+
+    # Respaldo para SQLite o terminos cortos: LIKE, que no usa el indice FULLTEXT
+    pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return or_(*(column.like(pattern, escape="\\") for column in columns)), columns[0].asc()
@@ -0,0 +1,212 @@
+# modulos externos
+import importlib
+import logging
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, exists, and_, or_
+
+# modulos internos
+from config.db import get_db
+from models.auction_model import auctions
+from models.item_model import items
+from models.payment_model import payments
+from models.archive_model import payments_archive
+from schemas.auction_schemas import AuctionState
+from schemas.payment_schemas import PaymentState
+from services.worker_services import BackgroundWorker, register_worker
+from services.outbox_services import subscribe
+from services.stats_services import increment, record_payment_created
+
+logger = logging.getLogger(__name__)
+
+# Desactivado por defecto: sin worker, al finalizar una subasta el pago se crea PENDING y se
+# cobra fuera de la API. Activarlo exige una pasarela real en PAYMENT_GATEWAY
+SETTLEMENT_ENABLED = os.getenv("SETTLEMENT_ENABLED", "false").lower() == "true"
+SETTLEMENT_INTERVAL = float(os.getenv("SETTLEMENT_INTERVAL", "5"))
+SETTLEMENT_BATCH_SIZE = int(os.getenv("SETTLEMENT_BATCH_SIZE", "100"))
+SETTLEMENT_CONCURRENCY = int(os.getenv("SETTLEMENT_CONCURRENCY", "8"))
+SETTLEMENT_MAX_RETRIES = int(os.getenv("SETTLEMENT_MAX_RETRIES", "3"))
+# Un pago reclamado que sigue PROCESSING pasado este tiempo se considera abandonado (el proceso cayo)
+SETTLEMENT_CLAIM_TIMEOUT = float(os.getenv("SETTLEMENT_CLAIM_TIMEOUT", "300"))
+PAYMENT_DEFAULT_METHOD = os.getenv("PAYMENT_DEFAULT_METHOD", "PAYPAL")
+PAYMENT_GATEWAY = os.getenv("PAYMENT_GATEWAY", "")
+# StubGateway marca los pagos como cobrados sin cobrar nada: solo para desarrollo
+SETTLEMENT_ALLOW_STUB = os.getenv("SETTLEMENT_ALLOW_STUB", "false").lower() == "true"
+
+class PaymentGateway(ABC):
+    # charge() devuelve True si el cobro se acepta y False si se rechaza; las excepciones
+    # se tratan como errores transitorios y se reintentan. payment["id"] debe usarse como
+    # clave de idempotencia: un pago abandonado se reclama y puede enviarse dos veces
+    @abstractmethod
+    def charge(self, payment: dict) -> bool:
+        pass
+
+class StubGateway(PaymentGateway):
+    # Pasarela local para desarrollo: simula latencia y una tasa de rechazos configurable
+    latency = float(os.getenv("SETTLEMENT_STUB_LATENCY", "0.05"))
+    decline_rate = float(os.getenv("SETTLEMENT_STUB_DECLINE_RATE", "0"))
+
+    def charge(self, payment: dict) -> bool:
+        time.sleep(self.latency)
+        return random.random() >= self.decline_rate
+
+def load_gateway(path: str) -> PaymentGateway:
+    if not path:
+        raise RuntimeError("SETTLEMENT_ENABLED=true requires PAYMENT_GATEWAY (module.Class of a PaymentGateway)")
+    module_name, class_name = path.rsplit(".", 1)
+    gateway = getattr(importlib.import_module(module_name), class_name)()
+    if isinstance(gateway, StubGateway) and not SETTLEMENT_ALLOW_STUB:
+        raise RuntimeError("StubGateway marks payments as paid without charging; set SETTLEMENT_ALLOW_STUB=true in development only")
+    return gateway
+
+def unpaid_winners():
+    # Subastas finalizadas con ganador (items.user_id) y todavia sin pago, ni vivo ni archivado:
+    # archive_payments mueve los pagos liquidados y el ganador no debe cobrarse otra vez
+    return (
+        select(items.c.id, items.c.final_price, items.c.user_id, items.c.category_id)
+        .join(auctions, auctions.c.item_id == items.c.id)
+        .where(
+            auctions.c.state == AuctionState.finished.value,
+            items.c.user_id.isnot(None),
+            ~exists().where(payments.c.item_id == items.c.id),
+            ~exists().where(payments_archive.c.item_id == items.c.id)
+        )
+    )
+
+def insert_pending_payments(db, winners: list) -> int:
+    # Sin commit: se confirma con la transaccion del llamador
+    if not winners:
+        return 0
+
+    now = datetime.now()
+    db.execute(payments.insert(), [
+        {
+            "amount": winner["final_price"],
+            "method": PAYMENT_DEFAULT_METHOD,
+            "date": now,
+            "state": PaymentState.pending.value,
+            "item_id": winner["id"],
+            "user_id": winner["user_id"]
+        } for winner in winners
+    ])
+    per_category = Counter(winner["category_id"] for winner in winners)
+    for category_id, count in per_category.items():
+        record_payment_created(db, category_id, count)
+    return len(winners)
+
+def create_pending_payments(db) -> int:
+    created = insert_pending_payments(db, db.execute(unpaid_winners().limit(SETTLEMENT_BATCH_SIZE)).mappings().all())
+    if created:
+        db.commit()
+    return created
+
+class SettlementWorker(BackgroundWorker):
+    name = "settlement"
+    interval = SETTLEMENT_INTERVAL
+
+    def __init__(self):
+        super().__init__()
+        self.gateway = None
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=SETTLEMENT_CONCURRENCY, thread_name_prefix="settlement")
+
+    def backlog(self) -> int:
+        return self.pending
+
+    def charge(self, payment: dict) -> str:
+        for attempt in range(SETTLEMENT_MAX_RETRIES):
+            try:
+                return PaymentState.paid.value if self.gateway.charge(payment) else PaymentState.failed.value
+            except Exception as e:
+                logger.warning("Gateway error for payment %s (attempt %s): %s", payment["id"], attempt + 1, e)
+                time.sleep(min(2 ** attempt * 0.2, 5))
+        # Se agotaron los reintentos: sigue pendiente para la siguiente tanda
+        return PaymentState.pending.value
+
+    def claim_payments(self, db) -> tuple[list[dict], datetime]:
+        # FOR UPDATE SKIP LOCKED solo mientras se reclama el lote: los pagos pasan a PROCESSING
+        # y se confirma antes de llamar a la pasarela, asi ninguna fila queda bloqueada durante
+        # los cobros. Sin segundos fraccionarios: claimed_at sirve de marca del lote al escribir
+        claimed_at = datetime.now().replace(microsecond=0)
+        abandoned = claimed_at - timedelta(seconds=SETTLEMENT_CLAIM_TIMEOUT)
+        claimed = db.execute(
+            select(payments.c.id, payments.c.amount, payments.c.item_id, payments.c.user_id, items.c.category_id)
+            .join(items, items.c.id == payments.c.item_id)
+            .where(or_(
+                payments.c.state == PaymentState.pending.value,
+                and_(payments.c.state == PaymentState.processing.value, payments.c.claimed_at < abandoned)
+            ))
+            .order_by(payments.c.id)
+            .limit(SETTLEMENT_BATCH_SIZE)
+            .with_for_update(of=payments, skip_locked=True)
+        ).mappings().all()
+        if claimed:
+            db.execute(
+                payments.update()
+                .where(payments.c.id.in_([payment["id"] for payment in claimed]))
+                .values(state=PaymentState.processing.value, claimed_at=claimed_at)
+            )
+        db.commit()
+        return [dict(payment) for payment in claimed], claimed_at
+
+    def record_results(self, db, claimed: list[dict], results: list[str], claimed_at: datetime) -> int:
+        by_state = {}
+        revenue = {}
+        for payment, state in zip(claimed, results):
+            by_state.setdefault(state, []).append(payment["id"])
+            if state == PaymentState.paid.value:
+                paid, amount = revenue.get(payment["category_id"], (0, 0))
+                revenue[payment["category_id"]] = (paid + 1, amount + payment["amount"])
+
+        # Solo se escriben las filas de este lote: si otro worker las reclamo tras el timeout
+        # su claimed_at ya no coincide
+        settled = 0
+        for state, ids in by_state.items():
+            result = db.execute(
+                payments.update()
+                .where(
+                    payments.c.id.in_(ids),
+                    payments.c.state == PaymentState.processing.value,
+                    payments.c.claimed_at == claimed_at
+                )
+                .values(state=state, claimed_at=None)
+            )
+            if state != PaymentState.pending.value:
+                settled += result.rowcount
+        for category_id, (paid, amount) in revenue.items():
+            increment(db, category_id, payments_paid=paid, revenue=amount)
+        db.commit()
+        return settled
+
+    def settle_pending(self, db) -> int:
+        claimed, claimed_at = self.claim_payments(db)
+        self.pending = len(claimed)
+        if not claimed:
+            return 0
+
+        # Fuera de cualquier transaccion: los reintentos y esperas no retienen cerrojos
+        results = list(self._executor.map(self.charge, claimed))
+        return self.record_results(db, claimed, results, claimed_at)
+
+    def run_once(self) -> int:
+        if self.gateway is None:
+            self.gateway = load_gateway(PAYMENT_GATEWAY)
+        with get_db() as db:
+            created = create_pending_payments(db)
+            settled = self.settle_pending(db)
+        return created + settled
+
+settlement_worker = register_worker(SettlementWorker(), enabled=SETTLEMENT_ENABLED)
+
+# La configuracion de la pasarela se valida al arrancar, no con el primer cobro
+if SETTLEMENT_ENABLED:
+    settlement_worker.gateway = load_gateway(PAYMENT_GATEWAY)
+
+# Los eventos pueden repetirse: despertar al worker es idempotente
+subscribe("auction.finished", lambda outbox_event: settlement_worker.wake())
@@ -0,0 +1,153 @@
+# modulos externos
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, func
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+# modulos internos
+from config.db import get_read_db
+from models.category_model import categories
+from models.stats_model import stats_hourly
+from schemas.payment_schemas import PaymentState
+from schemas.stats_schemas import CategoryRevenue, HourlyBids, Conversion
+from schemas.auth_schemas import Token
+from services.user_services import is_admin
+from services.outbox_services import project
+
+COUNTERS = ("bids_count", "bids_amount", "auctions_finished", "payments_created", "payments_paid", "revenue")
+
+def naive_utc(value: datetime) -> datetime:
+    # Las horas de stats_hourly se guardan en UTC sin zona; una fecha sin zona es hora local
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def current_hour() -> datetime:
+    return naive_utc(datetime.now()).replace(minute=0, second=0, microsecond=0)
+
+def increment(db, category_id: int, hour: datetime = None, **deltas) -> None:
+    # UPSERT que suma los deltas a la fila (hora, categoria); se ejecuta dentro de la
+    # transaccion del llamador para que el agregado nunca se desvie de los datos
+    values = {"hour": hour or current_hour(), "category_id": category_id}
+    values.update({counter: deltas.get(counter, 0) for counter in COUNTERS})
+
+    if db.get_bind().dialect.name == "mysql":
+        statement = mysql.insert(stats_hourly).values(values)
+        statement = statement.on_duplicate_key_update({
+            counter: stats_hourly.c[counter] + statement.inserted[counter] for counter in deltas
+        })
+    else:
+        statement = sqlite.insert(stats_hourly).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=["hour", "category_id"],
+            set_={counter: stats_hourly.c[counter] + statement.excluded[counter] for counter in deltas}
+        )
+    db.execute(statement)
+
+def record_bids(db, events: list[dict]) -> None:
+    # Las pujas se agregan desde el outbox y no en create_bid: la fila de la hora en curso
+    # seria un punto caliente compartido por todas las pujas. Un UPSERT por (hora, categoria)
+    totals = {}
+    for bid_event in events:
+        payload = bid_event["payload"]
+        if payload.get("category_id") is None:
+            continue
+        hour = naive_utc(datetime.fromisoformat(payload["date"])).replace(minute=0, second=0, microsecond=0)
+        count, amount = totals.get((hour, payload["category_id"]), (0, Decimal(0)))
+        totals[(hour, payload["category_id"])] = (count + 1, amount + Decimal(str(payload["amount"])))
+    for (hour, category_id), (count, amount) in totals.items():
+        increment(db, category_id, hour=hour, bids_count=count, bids_amount=amount)
+
+project("bid.created", record_bids)
+
+def record_auction_finished(db, category_id: int) -> None:
+    increment(db, category_id, auctions_finished=1)
+
+def record_payment_created(db, category_id: int, count: int = 1) -> None:
+    increment(db, category_id, payments_created=count)
+
+def record_payment_state(db, category_id: int, amount: Decimal, old_state: str, new_state: str) -> None:
+    # Solo cuentan las transiciones hacia o desde PAID
+    paid = PaymentState.paid.value
+    if old_state != paid and new_state == paid:
+        increment(db, category_id, payments_paid=1, revenue=amount)
+    elif old_state == paid and new_state != paid:
+        increment(db, category_id, payments_paid=-1, revenue=-amount)
+
+def _window(start: datetime, end: datetime, default: timedelta) -> tuple[datetime, datetime]:
+    end = naive_utc(end or datetime.now())
+    start = naive_utc(start) if start else end - default
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid dates")
+    return start, end
+
+def get_revenue_by_category(start: datetime, end: datetime, token: Token) -> list[CategoryRevenue]:
+    if not is_admin(token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
+    start, end = _window(start, end, timedelta(days=30))
+
+    with get_read_db(token) as db:
+        try:
+            query = (
+                select(
+                    stats_hourly.c.category_id,
+                    categories.c.name.label("category_name"),
+                    func.sum(stats_hourly.c.payments_paid).label("payments_paid"),
+                    func.sum(stats_hourly.c.revenue).label("revenue")
+                )
+                .outerjoin(categories, categories.c.id == stats_hourly.c.category_id)
+                .where(stats_hourly.c.hour >= start, stats_hourly.c.hour <= end)
+                .group_by(stats_hourly.c.category_id, categories.c.name)
+                .order_by(func.sum(stats_hourly.c.revenue).desc())
+            )
+            return [CategoryRevenue(**row) for row in db.execute(query).mappings().all()]
+
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
+
+def get_bids_per_hour(start: datetime, end: datetime, token: Token) -> list[HourlyBids]:
+    if not is_admin(token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
+    start, end = _window(start, end, timedelta(days=1))
+
+    with get_read_db(token) as db:
+        try:
+            query = (
+                select(
+                    stats_hourly.c.hour,
+                    func.sum(stats_hourly.c.bids_count).label("bids_count"),
+                    func.sum(stats_hourly.c.bids_amount).label("bids_amount")
+                )
+                .where(stats_hourly.c.hour >= start, stats_hourly.c.hour <= end)
+                .group_by(stats_hourly.c.hour)
+                .order_by(stats_hourly.c.hour)
+            )
+            return [HourlyBids(**row) for row in db.execute(query).mappings().all()]
+
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
+
+def get_conversion(start: datetime, end: datetime, token: Token) -> Conversion:
+    if not is_admin(token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
+    start, end = _window(start, end, timedelta(days=30))
+
+    with get_read_db(token) as db:
+        try:
+            query = (
+                select(*(func.coalesce(func.sum(stats_hourly.c[counter]), 0).label(counter) for counter in COUNTERS))
+                .where(stats_hourly.c.hour >= start, stats_hourly.c.hour <= end)
+            )
+            row = db.execute(query).mappings().first()
+            finished = row["auctions_finished"]
+            return Conversion(
+                auctions_finished = finished,
+                payments_created = row["payments_created"],
+                payments_paid = row["payments_paid"],
+                revenue = row["revenue"],
+                conversion_rate = round(row["payments_paid"] / finished, 4) if finished else 0.0
+            )
+
+        except SQLAlchemyError as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
@@ -0,0 +1,184 @@
+# modulos externos
+import os
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import select, func
+
+# modulos internos
+from config.db import get_db, get_read_db
+from models.change_model import changes, change_horizon
+from schemas.auth_schemas import Token
+from services.auth_services import read_access_token
+from services.cache_services import invalidate
+from services.msgpack_services import render, wants_msgpack
+from services.worker_services import BackgroundWorker, register_worker
+
+SYNC_COMPACT_ENABLED = os.getenv("SYNC_COMPACT_ENABLED", "true").lower() == "true"
+SYNC_COMPACT_INTERVAL = float(os.getenv("SYNC_COMPACT_INTERVAL", "3600"))
+SYNC_RETENTION_DAYS = float(os.getenv("SYNC_RETENTION_DAYS", "30"))
+SYNC_COMPACT_BATCH_SIZE = int(os.getenv("SYNC_COMPACT_BATCH_SIZE", "1000"))
+# Las versiones son ids autoincrementales y no se confirman en orden: un cambio con version menor
+# puede aparecer despues. Los cambios de los ultimos SYNC_SETTLE_SECONDS se consideran abiertos
+SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", "10"))
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+def record_change(db, entity: str, entity_ids, op: str = UPSERT) -> None:
+    if isinstance(entity_ids, int):
+        entity_ids = [entity_ids]
+    record_changes(db, [(entity, entity_id) for entity_id in entity_ids], op)
+
+def record_changes(db, entries: list[tuple[str, int]], op: str = UPSERT) -> None:
+    # Se escribe en la misma transaccion que el cambio, asi la version nunca adelanta a los datos.
+    # Varias entidades en un solo INSERT
+    for entity, entity_id in entries:
+        invalidate(db, entity, entity_id)
+    now = datetime.now(timezone.utc)
+    if entries:
+        db.execute(changes.insert(), [
+            {"entity": entity, "entity_id": entity_id, "op": op, "changed_at": now}
+            for entity, entity_id in entries
+        ])
+
+def record_dependents(db, entity: str, id_column, condition) -> None:
+    # Los listados muestran nombres de otras entidades (category_name, user_name, item_name,
+    # auction_name): al renombrar una, las filas que la muestran cambian para la sincronizacion,
+    # el ETag y la cache. Solo en renombrados, que son poco frecuentes
+    record_change(db, entity, db.execute(select(id_column).where(condition)).scalars().all())
+
+def settle_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=SYNC_SETTLE_SECONDS)
+
+def current_version(db, entity: str) -> tuple[int, Optional[datetime], int]:
+    # Ultima version y cuantos cambios siguen abiertos: un cambio confirmado tarde no sube la
+    # version maxima pero si el recuento, asi el ETag cambia igualmente
+    row = db.execute(
+        select(changes.c.version, changes.c.changed_at)
+        .where(changes.c.entity == entity)
+        .order_by(changes.c.version.desc())
+        .limit(1)
+    ).first()
+    if not row:
+        return 0, None, 0
+    recent = db.execute(
+        select(func.count()).select_from(changes)
+        .where(changes.c.entity == entity, changes.c.changed_at >= settle_cutoff())
+    ).scalar()
+    changed_at = row.changed_at
+    if changed_at.tzinfo is None:
+        changed_at = changed_at.replace(tzinfo=timezone.utc)
+    return row.version, changed_at, recent
+
+def changes_since(db, entity: str, since: int) -> tuple[int, list[int], list[int]]:
+    # Para cada fila solo cuenta su ultima operacion posterior a "since"
+    latest = (
+        select(changes.c.entity_id, func.max(changes.c.version).label("version"))
+        .where(changes.c.entity == entity, changes.c.version > since)
+        .group_by(changes.c.entity_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(changes.c.entity_id, changes.c.op, changes.c.version)
+        .join(latest, latest.c.version == changes.c.version)
+        .order_by(changes.c.version)
+    ).all()
+
+    # Se devuelve la version mas alta ya asentada, no la maxima: la siguiente peticion vuelve a
+    # leer los cambios abiertos y recoge los que se confirmen tarde (el cliente puede recibir
+    # un cambio dos veces, nunca perderlo)
+    settled = db.execute(
+        select(func.max(changes.c.version))
+        .where(changes.c.entity == entity, changes.c.version > since, changes.c.changed_at < settle_cutoff())
+    ).scalar()
+    version = max(since, settled or 0)
+    changed = [row.entity_id for row in rows if row.op != DELETE]
+    deleted = [row.entity_id for row in rows if row.op == DELETE]
+    return version, changed, deleted
+
+def compacted_version(db) -> int:
+    return db.execute(select(change_horizon.c.version).where(change_horizon.c.id == 1)).scalar() or 0
+
+def etag(entity: str, version: int, recent: int, wire_format: str) -> str:
+    # El formato negociado forma parte de la etiqueta: JSON y MessagePack son representaciones distintas
+    return f'W/"{entity}-{version}.{recent}-{wire_format}"'
+
+def not_modified(request: Request, tag: str, modified: Optional[datetime], recent: int) -> bool:
+    # If-None-Match tiene prioridad sobre If-Modified-Since (RFC 9110)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return any(candidate.strip() in (tag, "*") for candidate in if_none_match.split(","))
+
+    # Con cambios abiertos la fecha no basta: uno confirmado tarde puede ser anterior a ella
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and modified and not recent:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return modified.replace(microsecond=0) <= since
+    return False
+
+def sync_list(entity: str, request: Request, since: Optional[int], token: Token,
+              load: Callable[[Token, Optional[list[int]]], list]) -> Response:
+    # load(token, ids) devuelve el listado completo (ids = None) o solo las filas indicadas.
+    # El token se valida antes de comparar el ETag: un 304 tambien revela si el listado cambio
+    if not read_access_token(token).role:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
+
+    with get_read_db(token) as db:
+        version, modified, recent = current_version(db, entity)
+        tag = etag(entity, version, recent, "msgpack" if wants_msgpack(request) else "json")
+        headers = {"ETag": tag, "Cache-Control": "no-cache", "Vary": "Accept"}
+        if modified:
+            headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+        if not_modified(request, tag, modified, recent):
+            return Response(status_code=304, headers=headers)
+
+        # La version se lee antes que las filas: en el peor caso el cliente recibe dos veces un cambio
+        if since is not None:
+            # Los cambios anteriores a la compactacion ya no estan: el cliente recarga el listado
+            if since < compacted_version(db):
+                raise HTTPException(status_code=status.HTTP_410_GONE, detail="Sync version expired, reload the full list")
+            version, changed, deleted = changes_since(db, entity, since)
+
+    if since is None:
+        return render(request, load(token, None), headers=headers)
+
+    body = {
+        "version": version,
+        "changed": load(token, changed) if changed else [],
+        "deleted": deleted
+    }
+    return render(request, body, headers=headers)
+
+class ChangeCompactor(BackgroundWorker):
+    # Borra por lotes los cambios de mas de SYNC_RETENTION_DAYS salvo el ultimo de cada entidad,
+    # que da la version del ETag y Last-Modified. Los "since" anteriores reciben 410
+    name = "sync-compactor"
+    interval = SYNC_COMPACT_INTERVAL
+
+    def run_once(self) -> int:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=SYNC_RETENTION_DAYS)
+        with get_db() as db:
+            latest = select(func.max(changes.c.version)).group_by(changes.c.entity)
+            versions = db.execute(
+                select(changes.c.version)
+                .where(changes.c.changed_at < cutoff, changes.c.version.notin_(latest))
+                .order_by(changes.c.version)
+                .limit(SYNC_COMPACT_BATCH_SIZE)
+            ).scalars().all()
+            if not versions:
+                return 0
+
+            db.execute(changes.delete().where(changes.c.version.in_(versions)))
+            horizon = max(compacted_version(db), versions[-1])
+            if db.execute(change_horizon.update().where(change_horizon.c.id == 1).values(version=horizon)).rowcount == 0:
+                db.execute(change_horizon.insert().values(id=1, version=horizon))
+            db.commit()
+            return len(versions)
+
+change_compactor = register_worker(ChangeCompactor(), enabled=SYNC_COMPACT_ENABLED)
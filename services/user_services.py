@@ -4,27 +4,21 @@ from fastapi import HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 
-from passlib.context import CryptContext
-
 from datetime import datetime
 
 # modulos internos
-from config.db import get_db
+from config.db import get_db, get_read_db, mark_write
 
 from models.user_model import users
+from models.item_model import items
+from models.bid_model import bids
 
 from schemas.user_schemas import UserResponse, UserRequest, UserUpdate
 from schemas.auth_schemas import Token
 
-from services.auth_services import read_access_token
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+from services.auth_services import read_access_token, hash_password
+from services.patch_services import changed_values
+from services.sync_services import record_dependents
 
 def is_admin(token: Token) -> bool:
     token_data = read_access_token(token)
@@ -39,7 +33,7 @@ def get_all_users(token: Token) -> list[UserResponse]:
     if not is_admin(token):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
-    with get_db() as db:
+    with get_read_db(token) as db:
         try:
     
             query = select(users)
@@ -83,6 +77,7 @@ def create_admin(user: UserRequest, token: Token) -> UserResponse:
             
             db.execute(query)
             db.commit()
+            mark_write(token)
 
             query2 = select(users).where(users.c.email == user.email)
             user_db = db.execute(query2).fetchone()
@@ -99,9 +94,9 @@ def create_admin(user: UserRequest, token: Token) -> UserResponse:
         except SQLAlchemyError as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {str(e)}")
     
-def get_user_by_id(id: int) -> UserResponse:
+def get_user_by_id(id: int, key: str = None) -> UserResponse:
     
-    with get_db() as db:
+    with get_read_db(key) as db:
         try:
             query = select(users).where(users.c.id == id)
 
@@ -125,26 +120,36 @@ def update_user(id: int, user: UserUpdate, token: Token) -> UserResponse:
     if not is_admin(token):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized user")
     
+    values = changed_values(user, users, UserResponse)
+    if "password" in values:
+        values["password"] = hash_password(values["password"])
+
     with get_db() as db:
         try:
-            user_db = db.execute(select(users).where(users.c.id == id)).mappings().fetchone()
+            if values:
+                result = db.execute(users.update().where(users.c.id == id).values(values))
+                if result.rowcount == 0:
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+                if "name" in values:
+                    record_dependents(db, "items", items.c.id, items.c.user_id == id)
+                    record_dependents(db, "bids", bids.c.id, bids.c.user_id == id)
+
+            columns = [column for column in users.c if column.name != "password"]
+            user_db = db.execute(select(*columns).where(users.c.id == id)).mappings().fetchone()
             if not user_db:
-                raise ValueError("User not found")
-    
-            user_updated = {
-                "name": user_db["name"] if user.name is None else user.name,
-                "email": user_db["email"] if user.email is None else user.email,
-                "password": user_db["password"] if user.password is None else hash_password(user.password),
-                "adress": user_db["adress"] if user.adress is None else user.adress,
-                "phone": user_db["phone"] if user.phone is None else user.phone,
-                "img": user_db["img"] if user.img is None else user.img
-            }
-
-            query = users.update().where(users.c.id == id).values(user_updated)
-            
-            db.execute(query)
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+            user_response = UserResponse(
+                id = id,
+                name = user_db["name"],
+                email = user_db["email"],
+                adress = user_db["adress"],
+                role = user_db["role"],
+                phone = user_db["phone"],
+                img = user_db["img"]
+            )
             db.commit()
-            return get_user_by_id(id)
+            mark_write(token)
+            return user_response
         
         except SQLAlchemyError as e:
             db.rollback()
@@ -161,6 +166,7 @@ def delete_user_by_id(id: int, token: Token) -> None:
 
             db.execute(query)
             db.commit()
+            mark_write(token)
             
         except SQLAlchemyError as e:
             db.rollback()
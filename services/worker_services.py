@@ -0,0 +1,90 @@
+# modulos externos
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+
+# modulos internos
+from services.health_services import register_check
+
+logger = logging.getLogger(__name__)
+
+class BackgroundWorker(ABC):
+    # Hilo en segundo plano que llama a run_once() en bucle. Si no proceso nada espera
+    # `interval` segundos o hasta que alguien lo despierte con wake()
+    name = "worker"
+    interval = 1.0
+    max_backlog = 1000
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self.last_run = None
+        self.last_error = None
+
+    @abstractmethod
+    def run_once(self) -> int:
+        # Devuelve cuantos elementos proceso; 0 hace que el worker espere `interval`
+        pass
+
+    def backlog(self) -> int:
+        return 0
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+                self.last_run = time.time()
+                self.last_error = None
+            except Exception as e:
+                processed = 0
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.exception("Worker %s failed", self.name)
+
+            if not processed:
+                self._wake.wait(self.interval)
+                self._wake.clear()
+
+    def status(self) -> dict:
+        alive = self._thread is not None and self._thread.is_alive()
+        backlog = self.backlog()
+        return {
+            "ready": alive and backlog < self.max_backlog,
+            "alive": alive,
+            "backlog": backlog,
+            "last_run": self.last_run,
+            "last_error": self.last_error
+        }
+
+workers: list[BackgroundWorker] = []
+
+def register_worker(worker: BackgroundWorker, enabled: bool = True) -> BackgroundWorker:
+    if enabled:
+        workers.append(worker)
+    return worker
+
+def start_workers() -> None:
+    for worker in workers:
+        worker.start()
+        register_check(worker.name, worker.status)
+
+def stop_workers() -> None:
+    for worker in workers:
+        worker.stop()
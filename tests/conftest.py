@@ -0,0 +1,91 @@
+# modulos externos
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# La configuracion se lee al importar los modulos: se fija antes de importar la aplicacion
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("ACCESS_LOG_ENABLED", "false")
+os.environ.setdefault("COORDINATION_BACKEND", "local")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+# modulos internos
+import app
+from config.db import engine, meta
+from services.auth_services import hash_password
+from services.cache_services import read_cache
+from services.idempotency_services import store
+
+@pytest.fixture(scope="session")
+def client():
+    # Sin "with": el lifespan no arranca los workers, los tests los ejecutan con run_once()
+    return TestClient(app.app)
+
+@pytest.fixture(autouse=True)
+def database():
+    meta.drop_all(engine)
+    meta.create_all(engine)
+    read_cache.clear()
+    store._entries.clear()
+    yield engine
+
+def login(client, email: str, password: str = "secret") -> dict:
+    token = client.post("/auth/login", json={"email": email, "password": password}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def admin_headers(client):
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO users (name, email, password, role) VALUES ('admin', 'admin@test.com', :password, 'ADMIN')"),
+            {"password": hash_password("secret")}
+        )
+    return login(client, "admin@test.com")
+
+@pytest.fixture
+def user_headers(client):
+    client.post("/auth/register", json={"name": "user", "email": "user@test.com", "password": "secret"})
+    return login(client, "user@test.com")
+
+@pytest.fixture
+def auction(client, admin_headers):
+    # Categoria, articulo y subasta en curso que termina dentro de una hora
+    now = datetime.now(timezone.utc)
+    category = client.post("/admin/categories/", json={"name": "vases"}, headers=admin_headers).json()
+    item = client.post("/items/", json={
+        "name": "vase", "description": "a nice vase", "init_price": 10, "category_id": category["id"]
+    }, headers=admin_headers).json()
+    created = client.post("/auctions/", json={
+        "name": "vase auction", "description": "vase", "state": "EN CURSO", "item_id": item["id"],
+        "start_date": (now + timedelta(minutes=1)).isoformat(), "end_date": (now + timedelta(hours=1)).isoformat()
+    }, headers=admin_headers).json()
+    return {"category_id": category["id"], "item_id": item["id"], "auction_id": created["id"]}
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+@pytest.fixture
+def queries():
+    return count_queries
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+
+from models.auction_model import auctions
+from models.item_model import items
+from services.archive_services import ARCHIVE_RETENTION_DAYS, archive_worker
+
+def archive_finished_auction(client, admin_headers, user_headers, auction, database):
+    client.post("/bids/", json={"amount": 5, "auction_id": auction["auction_id"]}, headers=user_headers)
+    client.put(f"/auctions/{auction['auction_id']}", json={"state": "FINALIZADA"}, headers=admin_headers)
+    # Solo se archivan los pagos liquidados
+    client.put("/payments/1", json={"state": "PAID"}, headers=admin_headers)
+    with database.begin() as conn:
+        conn.execute(auctions.update().values(end_date=datetime.now() - timedelta(days=ARCHIVE_RETENTION_DAYS + 1)))
+    archive_worker.run_once()
+
+def test_archive_lists_survive_deleted_parents(client, admin_headers, user_headers, auction, database):
+    archive_finished_auction(client, admin_headers, user_headers, auction, database)
+
+    # El historico no tiene claves foraneas: la subasta y el articulo pueden borrarse
+    with database.begin() as conn:
+        conn.execute(auctions.delete())
+        conn.execute(items.delete())
+
+    response = client.get("/bids/?archived=true", headers=admin_headers)
+    assert response.status_code == 200
+    assert [bid["auction_name"] for bid in response.json()] == [None]
+
+    response = client.get("/payments/?archived=true", headers=admin_headers)
+    assert response.status_code == 200
+    assert [(payment["state"], payment["item_name"]) for payment in response.json()] == [("PAID", None)]
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from models.auction_model import auctions
+
+def test_dates_are_stored_in_utc(client, admin_headers, user_headers, auction, database):
+    # Cierra dentro de 30 minutos, expresado en la hora local de un cliente en UTC-5
+    client_zone = timezone(timedelta(hours=-5))
+    end = datetime.now(timezone.utc) + timedelta(minutes=30)
+    created = client.post("/auctions/", json={
+        "name": "lamp auction", "description": "lamp", "state": "EN CURSO", "item_id": auction["item_id"],
+        "start_date": (end - timedelta(minutes=10)).astimezone(client_zone).isoformat(),
+        "end_date": end.astimezone(client_zone).isoformat()
+    }, headers=admin_headers)
+    assert created.status_code == 200
+
+    with database.connect() as conn:
+        stored = conn.execute(select(auctions.c.end_date).where(auctions.c.id == created.json()["id"])).scalar()
+    assert stored == end.replace(tzinfo=None)
+
+    # Guardada como hora local del cliente la subasta ya habria cerrado hace cuatro horas y media
+    response = client.post("/bids/", json={"amount": 1, "auction_id": created.json()["id"]}, headers=user_headers)
+    assert response.status_code == 200
+
+    client.put(f"/auctions/{created.json()['id']}", json={"end_date": end.astimezone(client_zone).isoformat()}, headers=admin_headers)
+    with database.connect() as conn:
+        stored = conn.execute(select(auctions.c.end_date).where(auctions.c.id == created.json()["id"])).scalar()
+    assert stored == end.replace(tzinfo=None)
@@ -0,0 +1,47 @@
+import threading
+from datetime import datetime, timedelta
+
+import services.bid_queue_services as bid_queue
+from models.auction_model import auctions
+from services.bid_services import PriceChanged
+
+ASYNC = {"Prefer": "respond-async"}
+
+def queue_bid(client, user_headers, auction) -> dict:
+    response = client.post("/bids/", json={"amount": 1, "auction_id": auction["auction_id"]}, headers={**user_headers, **ASYNC})
+    assert response.status_code == 202
+    return response.json()
+
+def test_waiting_for_a_ticket_returns_the_verdict(client, user_headers, auction):
+    ticket = queue_bid(client, user_headers, auction)
+    sequencer = bid_queue.sequencer_for(auction["auction_id"])
+    threading.Timer(0.2, sequencer.run_once).start()
+
+    response = client.get(f"/bids/tickets/{ticket['id']}?wait=5", headers=user_headers)
+    assert response.json()["state"] == "ACCEPTED"
+
+def test_wait_times_out_while_queued(client, user_headers, auction):
+    ticket = queue_bid(client, user_headers, auction)
+    response = client.get(f"/bids/tickets/{ticket['id']}?wait=0.1", headers=user_headers)
+    assert response.json()["state"] == "QUEUED"
+    bid_queue.sequencer_for(auction["auction_id"]).run_once()
+
+def test_only_price_changes_are_retried(client, user_headers, auction, database, monkeypatch):
+    calls = []
+    def price_changed(bid, token, received_at):
+        calls.append(bid)
+        raise PriceChanged()
+    monkeypatch.setattr(bid_queue, "create_bid", price_changed)
+    ticket = queue_bid(client, user_headers, auction)
+    bid_queue.sequencer_for(auction["auction_id"]).run_once()
+    assert len(calls) == bid_queue.BID_QUEUE_RETRIES
+
+    # Una subasta cerrada se rechaza al primer intento
+    calls.clear()
+    with database.begin() as conn:
+        conn.execute(auctions.update().values(end_date=datetime.now() - timedelta(hours=1)))
+    monkeypatch.undo()
+    ticket = queue_bid(client, user_headers, auction)
+    bid_queue.sequencer_for(auction["auction_id"]).run_once()
+    response = client.get(f"/bids/tickets/{ticket['id']}", headers=user_headers).json()
+    assert (response["state"], response["status_code"], response["detail"]) == ("REJECTED", 409, "Auction is closed")
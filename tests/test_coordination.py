@@ -0,0 +1,47 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import services.cache_services as cache
+from models.coordination_model import coordination_messages
+from services.coordination_services import DatabaseCoordinator
+
+@pytest.fixture
+def receiver():
+    coordinator = DatabaseCoordinator()
+    received = []
+    coordinator.subscribe("test", received.append)
+    coordinator.tick()
+    return coordinator, received
+
+def insert_message(database, number: int, id: int = None) -> None:
+    values = {"channel": "test", "payload": json.dumps({"n": number}), "origin": "other", "created_at": datetime.now()}
+    if id is not None:
+        values["id"] = id
+    with database.begin() as conn:
+        conn.execute(coordination_messages.insert().values(values))
+
+def test_messages_committed_out_of_order_are_delivered(database, receiver):
+    coordinator, received = receiver
+    # El id 5 se confirma antes que el 4 (otra transaccion lo reservo primero)
+    insert_message(database, 2, id=5)
+    coordinator.tick()
+    insert_message(database, 1, id=4)
+    coordinator.tick()
+    coordinator.tick()
+    assert received == [{"n": 2}, {"n": 1}]
+
+def test_invalidations_are_broadcast_in_one_message(client, admin_headers, auction, monkeypatch):
+    published = []
+    monkeypatch.setattr(cache.coordinator, "shared", True)
+    monkeypatch.setattr(cache.coordinator, "publish", lambda channel, message: published.append((channel, message)))
+
+    for name in ("jar", "pot"):
+        client.put(f"/items/{auction['item_id']}", json={"name": name}, headers=admin_headers)
+    assert published == []
+
+    cache.broadcast_invalidations()
+    assert published == [(cache.CACHE_CHANNEL, {"keys": [f"auctions:{auction['auction_id']}", f"items:{auction['item_id']}"]})]
+    cache.broadcast_invalidations()
+    assert len(published) == 1
@@ -0,0 +1,21 @@
+import threading
+
+import services.health_services as health
+
+def test_hung_ping_is_not_queued_again(monkeypatch):
+    release = threading.Event()
+    pings = []
+    def hung_ping():
+        pings.append(1)
+        release.wait(5)
+    monkeypatch.setattr(health, "_ping", hung_ping)
+    monkeypatch.setattr(health, "READY_TIMEOUT", 0.05)
+
+    for _ in range(3):
+        assert health.check_database()["reason"] == "connection checkout timed out"
+    assert health._probe_executor._work_queue.qsize() == 0
+
+    release.set()
+    health._pending_ping.result(timeout=5)
+    assert len(pings) == 1
+    assert health.check_database()["ready"] is True
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func
+
+from models.bid_model import bids
+from services.auth_services import create_access_token
+
+def bid_count(database) -> int:
+    with database.connect() as conn:
+        return conn.execute(select(func.count()).select_from(bids)).scalar()
+
+def test_retry_replays_stored_response(client, user_headers, auction, database):
+    headers = {**user_headers, "Idempotency-Key": "bid-1"}
+    body = {"amount": 1, "auction_id": auction["auction_id"]}
+    first = client.post("/bids/", json=body, headers=headers)
+    second = client.post("/bids/", json=body, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.json() == first.json()
+    assert bid_count(database) == 1
+
+def test_retry_after_token_refresh_is_not_executed_twice(client, user_headers, auction, database):
+    body = {"amount": 1, "auction_id": auction["auction_id"]}
+    client.post("/bids/", json=body, headers={**user_headers, "Idempotency-Key": "bid-1"})
+
+    # Otro token del mismo usuario (distinta caducidad, distinta cadena)
+    refreshed = create_access_token({"sub": "user@test.com", "iat": datetime.now() - timedelta(minutes=5)})
+    response = client.post("/bids/", json=body, headers={"Authorization": f"Bearer {refreshed}", "Idempotency-Key": "bid-1"})
+
+    assert response.headers["idempotent-replayed"] == "true"
+    assert bid_count(database) == 1
+
+def test_same_key_from_another_user_is_independent(client, admin_headers, user_headers, auction, database):
+    body = {"amount": 1, "auction_id": auction["auction_id"]}
+    client.post("/bids/", json=body, headers={**user_headers, "Idempotency-Key": "bid-1"})
+    response = client.post("/bids/", json=body, headers={**admin_headers, "Idempotency-Key": "bid-1"})
+
+    assert "idempotent-replayed" not in response.headers
+    assert bid_count(database) == 2
+
+def test_key_reused_with_different_body_is_rejected(client, user_headers, auction):
+    headers = {**user_headers, "Idempotency-Key": "bid-1"}
+    client.post("/bids/", json={"amount": 1, "auction_id": auction["auction_id"]}, headers=headers)
+    response = client.post("/bids/", json={"amount": 2, "auction_id": auction["auction_id"]}, headers=headers)
+    assert response.status_code == 422
@@ -0,0 +1,76 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+import services.image_services as image_services
+from services.image_services import thumbnail_worker
+from services.worker_services import BackgroundWorker
+
+def png_base64(color: str = "red") -> str:
+    output = io.BytesIO()
+    Image.new("RGB", (400, 300), color).save(output, format="PNG")
+    return base64.b64encode(output.getvalue()).decode()
+
+def post_item(client, headers, category_id: int, img: str):
+    return client.post("/items/", json={
+        "name": "lamp", "description": "old lamp", "init_price": 5, "category_id": category_id, "img": img
+    }, headers=headers)
+
+def test_corrupt_image_is_rejected_on_upload(client, admin_headers, auction):
+    # Firma PNG valida seguida de basura: solo una decodificacion real lo detecta
+    corrupt = base64.b64encode(b"\x89PNG\r\n\x1a\n" + b"\x00" * 64).decode()
+    response = post_item(client, admin_headers, auction["category_id"], corrupt)
+    assert response.status_code == 400
+
+def test_thumbnail_revalidates_with_etag(client, admin_headers, auction):
+    item = post_item(client, admin_headers, auction["category_id"], png_base64("red")).json()
+    thumbnail_worker.run_once()
+
+    response = client.get(f"/items/{item['id']}/thumbnail/small", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+    tag = response.headers["etag"]
+    assert client.get(f"/items/{item['id']}/thumbnail/small", headers={**admin_headers, "If-None-Match": tag}).status_code == 304
+
+    # Una imagen nueva cambia el ETag de la misma URL
+    client.put(f"/items/{item['id']}", json={"img": png_base64("blue")}, headers=admin_headers)
+    thumbnail_worker.run_once()
+    response = client.get(f"/items/{item['id']}/thumbnail/small", headers={**admin_headers, "If-None-Match": tag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != tag
+
+def test_worker_requires_run_once():
+    with pytest.raises(TypeError):
+        BackgroundWorker()
+
+def test_cached_item_has_no_image_blob(client, admin_headers, auction):
+    client.put(f"/items/{auction['item_id']}", json={"img": png_base64()}, headers=admin_headers)
+    item = client.get(f"/items/{auction['item_id']}", headers=admin_headers).json()
+    assert item["img"] is None
+    assert item["img_url"] == f"/items/{auction['item_id']}/image"
+
+
+def test_images_require_a_session(client, admin_headers, auction):
+    client.put(f"/items/{auction['item_id']}", json={"img": png_base64()}, headers=admin_headers)
+    assert client.get(f"/items/{auction['item_id']}/image").status_code == 401
+    assert client.get(f"/items/{auction['item_id']}/thumbnail/small").status_code == 401
+    assert client.get(f"/items/{auction['item_id']}/image", headers=admin_headers).status_code == 200
+
+def test_deleting_an_item_removes_its_media_files(client, admin_headers, auction, tmp_path, monkeypatch):
+    monkeypatch.setattr(image_services, "MEDIA_ROOT", str(tmp_path))
+    item = post_item(client, admin_headers, auction["category_id"], png_base64()).json()
+    while thumbnail_worker.run_once():
+        pass
+    directory = tmp_path / "items" / str(item["id"])
+    assert (directory / "small.jpg").exists()
+
+    client.delete(f"/items/{item['id']}", headers=admin_headers)
+    assert not directory.exists()
+
+    # Un trabajo encolado antes del borrado no vuelve a crear el directorio
+    image_services.schedule_thumbnails(item["id"])
+    while thumbnail_worker.run_once():
+        pass
+    assert not directory.exists()
@@ -0,0 +1,18 @@
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from models.item_model import items
+
+def test_bids_add_up_exactly(client, user_headers, auction, database):
+    for amount in ("0.10", "0.20", "0.30"):
+        response = client.post("/bids/", json={"amount": amount, "auction_id": auction["auction_id"]}, headers=user_headers)
+        assert response.status_code == 200
+
+    with database.connect() as conn:
+        final_price = conn.execute(select(items.c.final_price).where(items.c.id == auction["item_id"])).scalar()
+    assert Decimal(final_price) == Decimal("10.60")
+
+def test_money_rejects_more_than_two_decimals(client, user_headers, auction):
+    response = client.post("/bids/", json={"amount": "0.001", "auction_id": auction["auction_id"]}, headers=user_headers)
+    assert response.status_code == 422
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func
+
+import services.outbox_services as outbox
+from models.outbox_model import outbox_events
+
+def event_count(database) -> int:
+    with database.connect() as conn:
+        return conn.execute(select(func.count()).select_from(outbox_events)).scalar()
+
+def test_no_events_are_written_when_disabled(client, user_headers, auction, database, monkeypatch):
+    monkeypatch.setattr(outbox, "OUTBOX_ENABLED", False)
+    client.post("/bids/", json={"amount": 1, "auction_id": auction["auction_id"]}, headers=user_headers)
+    assert event_count(database) == 0
+
+def test_relay_dispatches_and_purges_old_events(client, user_headers, auction, database, monkeypatch):
+    received = []
+    monkeypatch.setitem(outbox._subscribers, "bid.created", [received.append])
+    client.post("/bids/", json={"amount": 1, "auction_id": auction["auction_id"]}, headers=user_headers)
+
+    outbox.outbox_relay.last_purge = 0.0
+    outbox.outbox_relay.run_once()
+    assert [event["event_type"] for event in received] == ["bid.created"]
+    assert event_count(database) == 1
+
+    # Entregado hace mas de OUTBOX_RETENTION_HOURS: la siguiente purga lo borra
+    with database.begin() as conn:
+        conn.execute(outbox_events.update().values(dispatched_at=datetime.now() - timedelta(hours=outbox.OUTBOX_RETENTION_HOURS + 1)))
+    outbox.outbox_relay.last_purge = 0.0
+    outbox.outbox_relay.run_once()
+    assert event_count(database) == 0
+
+def test_batch_is_committed_before_dispatch(client, user_headers, auction, database, monkeypatch):
+    seen = []
+    def check_claim(event):
+        # Otra conexion ve el reclamo: el lote no sigue bloqueado durante la entrega
+        with database.connect() as conn:
+            seen.append(conn.execute(select(outbox_events.c.claimed_at).where(outbox_events.c.id == event["id"])).scalar())
+    monkeypatch.setitem(outbox._subscribers, "bid.created", [check_claim])
+    client.post("/bids/", json={"amount": 1, "auction_id": auction["auction_id"]}, headers=user_headers)
+
+    outbox.outbox_relay.run_once()
+    assert len(seen) == 1 and seen[0] is not None
+    with database.connect() as conn:
+        assert conn.execute(select(outbox_events.c.dispatched_at, outbox_events.c.claimed_at)).one()[1] is None
@@ -0,0 +1,11 @@
+def test_null_final_price_is_ignored(client, admin_headers, auction):
+    response = client.patch(f"/items/{auction['item_id']}", json={"final_price": None}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["final_price"] == 10
+    assert client.get("/items/", headers=admin_headers).status_code == 200
+
+def test_null_clears_optional_columns(client, admin_headers, auction):
+    client.patch(f"/items/{auction['item_id']}", json={"user_id": 1}, headers=admin_headers)
+    response = client.patch(f"/items/{auction['item_id']}", json={"user_id": None}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["user_name"] is None
@@ -0,0 +1,60 @@
+from sqlalchemy.dialects import mysql
+
+from models.item_model import items
+from services.search_services import search_condition
+
+def post_item(client, headers, category_id: int, name: str, description: str = "item"):
+    response = client.post("/items/", json={
+        "name": name, "description": description, "init_price": 5, "category_id": category_id
+    }, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+def search(client, headers, entity: str, q: str, **params) -> list[str]:
+    response = client.get(f"/{entity}/search", params={"q": q, **params}, headers=headers)
+    assert response.status_code == 200
+    return [result["name"] for result in response.json()]
+
+def test_search_items_by_name_and_description(client, admin_headers, auction):
+    post_item(client, admin_headers, auction["category_id"], "brass lamp")
+    post_item(client, admin_headers, auction["category_id"], "desk", "with a lamp holder")
+    post_item(client, admin_headers, auction["category_id"], "chair")
+
+    assert search(client, admin_headers, "items", "lamp") == ["brass lamp", "desk"]
+    assert search(client, admin_headers, "items", "lamp", limit=1, offset=1) == ["desk"]
+    assert search(client, admin_headers, "items", "sofa") == []
+
+def test_like_wildcards_are_literal(client, admin_headers, auction):
+    post_item(client, admin_headers, auction["category_id"], "100% wool")
+    post_item(client, admin_headers, auction["category_id"], "wool scarf")
+    post_item(client, admin_headers, auction["category_id"], "old_lamp")
+    post_item(client, admin_headers, auction["category_id"], "oldXlamp")
+    post_item(client, admin_headers, auction["category_id"], "c:\\lamp")
+
+    assert search(client, admin_headers, "items", "%") == ["100% wool"]
+    assert search(client, admin_headers, "items", "d_l") == ["old_lamp"]
+    assert search(client, admin_headers, "items", "\\") == ["c:\\lamp"]
+
+def test_search_auctions(client, admin_headers, auction):
+    response = client.get("/auctions/search", params={"q": "vase"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert [(result["name"], result["item_name"]) for result in response.json()] == [("vase auction", "vase")]
+    assert search(client, admin_headers, "auctions", "lamp") == []
+
+def test_search_requires_a_session(client):
+    assert client.get("/items/search", params={"q": "lamp"}).status_code == 401
+    assert client.get("/auctions/search", params={"q": "lamp"}).status_code == 401
+
+class MysqlSession:
+    def get_bind(self):
+        return self
+
+    dialect = mysql.dialect()
+
+def test_mysql_uses_fulltext_for_long_terms():
+    condition, _ = search_condition(MysqlSession(), [items.c.name, items.c.description], "lamp")
+    assert "MATCH" in str(condition.compile(dialect=mysql.dialect()))
+
+    # Terminos mas cortos que el token de InnoDB no estan en el indice: LIKE
+    condition, _ = search_condition(MysqlSession(), [items.c.name, items.c.description], "la")
+    assert "LIKE" in str(condition.compile(dialect=mysql.dialect()))
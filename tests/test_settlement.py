@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from models.archive_model import payments_archive
+from models.auction_model import auctions
+from models.payment_model import payments
+from services.archive_services import ARCHIVE_RETENTION_DAYS, archive_worker
+from services.settlement_services import PaymentGateway, settlement_worker, load_gateway
+
+class RecordingGateway(PaymentGateway):
+    def __init__(self, database, accept: bool = True):
+        self.database = database
+        self.accept = accept
+        self.seen_states = []
+
+    def charge(self, payment: dict) -> bool:
+        # Otra conexion ve el estado reclamado: el lote se confirmo antes de llamar a la pasarela
+        with self.database.connect() as conn:
+            self.seen_states.append(conn.execute(select(payments.c.state).where(payments.c.id == payment["id"])).scalar())
+        return self.accept
+
+@pytest.fixture
+def finished_auction(client, admin_headers, user_headers, auction):
+    client.post("/bids/", json={"amount": 5, "auction_id": auction["auction_id"]}, headers=user_headers)
+    client.put(f"/auctions/{auction['auction_id']}", json={"state": "FINALIZADA"}, headers=admin_headers)
+    return auction
+
+def payment_states(database) -> list[str]:
+    with database.connect() as conn:
+        return conn.execute(select(payments.c.state).order_by(payments.c.id)).scalars().all()
+
+def test_payment_is_claimed_and_committed_before_charging(finished_auction, database, monkeypatch):
+    gateway = RecordingGateway(database)
+    monkeypatch.setattr(settlement_worker, "gateway", gateway)
+
+    assert payment_states(database) == ["PENDING"]
+    settlement_worker.run_once()
+
+    assert gateway.seen_states == ["PROCESSING"]
+    assert payment_states(database) == ["PAID"]
+    # Una segunda pasada no vuelve a cobrar
+    settlement_worker.run_once()
+    assert len(gateway.seen_states) == 1
+
+def test_declined_payment_is_failed(finished_auction, database, monkeypatch):
+    monkeypatch.setattr(settlement_worker, "gateway", RecordingGateway(database, accept=False))
+    settlement_worker.run_once()
+    assert payment_states(database) == ["FAILED"]
+
+def test_abandoned_claim_is_retried(finished_auction, database, monkeypatch):
+    with database.begin() as conn:
+        conn.execute(payments.update().values(state="PROCESSING", claimed_at=datetime.now() - timedelta(hours=1)))
+    monkeypatch.setattr(settlement_worker, "gateway", RecordingGateway(database))
+    settlement_worker.run_once()
+    assert payment_states(database) == ["PAID"]
+
+def test_archived_payment_is_not_created_again(finished_auction, database, monkeypatch):
+    gateway = RecordingGateway(database)
+    monkeypatch.setattr(settlement_worker, "gateway", gateway)
+    settlement_worker.run_once()
+
+    with database.begin() as conn:
+        conn.execute(auctions.update().values(end_date=datetime.now() - timedelta(days=ARCHIVE_RETENTION_DAYS + 1)))
+    archive_worker.run_once()
+    assert payment_states(database) == []
+
+    settlement_worker.run_once()
+    assert payment_states(database) == []
+    assert len(gateway.seen_states) == 1
+    with database.connect() as conn:
+        assert conn.execute(select(payments_archive.c.state)).scalars().all() == ["PAID"]
+
+def test_gateway_must_be_configured():
+    with pytest.raises(RuntimeError):
+        load_gateway("")
+    # El stub no cobra: solo se carga con SETTLEMENT_ALLOW_STUB=true
+    with pytest.raises(RuntimeError):
+        load_gateway("services.settlement_services.StubGateway")
+
+def test_auction_without_bids_finishes_without_payment(client, admin_headers, auction, database):
+    response = client.put(f"/auctions/{auction['auction_id']}", json={"state": "FINALIZADA"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert payment_states(database) == []
+
+def test_finished_auction_gets_a_single_payment(finished_auction, client, admin_headers, database):
+    client.put(f"/auctions/{finished_auction['auction_id']}", json={"state": "FINALIZADA"}, headers=admin_headers)
+    assert payment_states(database) == ["PENDING"]
@@ -0,0 +1,66 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import select
+
+import services.outbox_services as outbox
+from models.stats_model import stats_hourly
+
+def bid_rollups(database) -> list:
+    with database.connect() as conn:
+        return conn.execute(select(stats_hourly.c.bids_count, stats_hourly.c.bids_amount)).all()
+
+def test_bid_rollups_are_written_by_the_relay(client, user_headers, auction, database):
+    for amount in (1, 2):
+        client.post("/bids/", json={"amount": amount, "auction_id": auction["auction_id"]}, headers=user_headers)
+    assert bid_rollups(database) == []
+
+    outbox.outbox_relay.run_once()
+    assert bid_rollups(database) == [(2, Decimal("3.00"))]
+
+    # Los eventos ya entregados no se vuelven a sumar
+    outbox.outbox_relay.run_once()
+    assert bid_rollups(database) == [(2, Decimal("3.00"))]
+
+def test_failed_dispatch_does_not_apply_rollups(client, user_headers, auction, database, monkeypatch):
+    def fail(event):
+        raise RuntimeError("subscriber down")
+    monkeypatch.setitem(outbox._subscribers, "bid.created", [fail])
+    client.post("/bids/", json={"amount": 1, "auction_id": auction["auction_id"]}, headers=user_headers)
+
+    outbox.outbox_relay.run_once()
+    assert bid_rollups(database) == []
+
+def test_bid_rollups_are_inline_when_outbox_disabled(client, user_headers, auction, database, monkeypatch):
+    monkeypatch.setattr(outbox, "OUTBOX_ENABLED", False)
+    client.post("/bids/", json={"amount": 1, "auction_id": auction["auction_id"]}, headers=user_headers)
+    assert bid_rollups(database) == [(1, Decimal("1.00"))]
+
+def test_totals_wider_than_a_single_amount(client, admin_headers, auction, database):
+    with database.begin() as conn:
+        conn.execute(stats_hourly.insert().values(
+            hour = datetime.now().replace(minute=0, second=0, microsecond=0),
+            category_id = auction["category_id"],
+            payments_paid = 1,
+            revenue = Decimal("123456789012.50")
+        ))
+    response = client.get("/admin/stats/conversion", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["revenue"] == 123456789012.5
+
+def test_poison_event_does_not_block_its_batch(client, user_headers, auction, database, monkeypatch):
+    def reject_large(event):
+        if event["payload"]["amount"] > 1:
+            raise RuntimeError("cannot handle")
+    monkeypatch.setitem(outbox._subscribers, "bid.created", [reject_large])
+    for amount in (1, 2, 1):
+        client.post("/bids/", json={"amount": amount, "auction_id": auction["auction_id"]}, headers=user_headers)
+
+    outbox.outbox_relay.run_once()
+    assert bid_rollups(database) == [(2, Decimal("2.00"))]
+
+def test_window_accepts_timezone_aware_dates(client, admin_headers):
+    response = client.get("/admin/stats/conversion?start=2024-01-01T00:00:00Z", headers=admin_headers)
+    assert response.status_code == 200
+    response = client.get("/admin/stats/bids?start=2024-01-01T02:00:00%2B02:00&end=2024-01-01T00:30:00Z", headers=admin_headers)
+    assert response.status_code == 200
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from models.change_model import changes
+from services.sync_services import SYNC_RETENTION_DAYS, change_compactor
+
+def test_token_is_checked_before_the_etag(client, admin_headers, auction):
+    tag = client.get("/items/", headers=admin_headers).headers["etag"]
+    response = client.get("/items/", headers={"Authorization": "Bearer invalid", "If-None-Match": tag})
+    assert response.status_code == 401
+
+def test_category_rename_changes_the_items(client, admin_headers, auction):
+    listed = client.get("/items/", headers=admin_headers)
+    version = int(listed.headers["etag"].split("-")[1].split(".")[0])
+
+    client.put(f"/admin/categories/{auction['category_id']}", json={"name": "jars"}, headers=admin_headers)
+
+    response = client.get("/items/", headers={**admin_headers, "If-None-Match": listed.headers["etag"]})
+    assert response.status_code == 200
+    delta = client.get(f"/items/?since={version}", headers=admin_headers).json()
+    assert [item["category_name"] for item in delta["changed"]] == ["jars"]
+
+def test_compaction_keeps_the_latest_change(client, admin_headers, auction, database):
+    for name in ("jar", "pot"):
+        client.put(f"/items/{auction['item_id']}", json={"name": name}, headers=admin_headers)
+    with database.begin() as conn:
+        conn.execute(changes.update().values(changed_at=datetime.now(timezone.utc) - timedelta(days=SYNC_RETENTION_DAYS + 1)))
+    tag = client.get("/items/", headers=admin_headers).headers["etag"]
+
+    assert change_compactor.run_once() > 0
+    with database.connect() as conn:
+        assert conn.execute(select(changes.c.entity).order_by(changes.c.entity)).scalars().all() == ["auctions", "items"]
+
+    # La version del listado no cambia; un "since" anterior a la compactacion recibe 410
+    response = client.get("/items/", headers={**admin_headers, "If-None-Match": tag})
+    assert response.status_code == 304
+    assert client.get("/items/?since=0", headers=admin_headers).status_code == 410
+
+def test_etag_depends_on_the_negotiated_format(client, admin_headers, auction):
+    json_tag = client.get("/items/", headers=admin_headers).headers["etag"]
+    msgpack_headers = {**admin_headers, "Accept": "application/msgpack"}
+    response = client.get("/items/", headers={**msgpack_headers, "If-None-Match": json_tag})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert response.headers["etag"] != json_tag
+    assert client.get("/items/", headers={**msgpack_headers, "If-None-Match": response.headers["etag"]}).status_code == 304
+
+def test_change_committed_late_is_not_skipped(client, admin_headers, auction, database):
+    # Version 100 confirmada antes que la 99 (otra transaccion reservo su id primero)
+    def insert_change(version: int, entity_id: int, op: str):
+        with database.begin() as conn:
+            conn.execute(changes.insert().values(version=version, entity="items", entity_id=entity_id, op=op, changed_at=datetime.now(timezone.utc)))
+
+    first_version = client.get("/items/?since=0", headers=admin_headers).json()["version"]
+    insert_change(100, auction["item_id"], "upsert")
+    listed = client.get("/items/", headers=admin_headers)
+    delta = client.get(f"/items/?since={first_version}", headers=admin_headers).json()
+    insert_change(99, 1000, "delete")
+
+    # El ETag cambia aunque la version maxima no, y el delta siguiente incluye la 99
+    assert client.get("/items/", headers={**admin_headers, "If-None-Match": listed.headers["etag"]}).status_code == 200
+    later = client.get(f"/items/?since={delta['version']}", headers=admin_headers).json()
+    assert later["deleted"] == [1000]
+    assert delta["version"] < 99
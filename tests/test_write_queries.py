@@ -0,0 +1,97 @@
+# Numero de sentencias SQL de cada endpoint de escritura: un cambio en estos numeros
+# significa una lectura o escritura de mas en el camino critico
+
+def test_post_category(client, admin_headers, queries):
+    with queries() as statements:
+        response = client.post("/admin/categories/", json={"name": "lamps"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert len(statements) == 2
+
+def test_put_category(client, admin_headers, auction, queries):
+    with queries() as statements:
+        response = client.put(f"/admin/categories/{auction['category_id']}", json={"name": "jars"}, headers=admin_headers)
+    assert response.status_code == 200
+    # Renombrar marca como cambiados los articulos de la categoria (SELECT + INSERT en changes)
+    assert len(statements) == 4
+
+def test_post_item(client, admin_headers, auction, queries):
+    with queries() as statements:
+        response = client.post("/items/", json={
+            "name": "lamp", "description": "old lamp", "init_price": 5, "category_id": auction["category_id"]
+        }, headers=admin_headers)
+    assert response.status_code == 200
+    assert len(statements) == 4
+
+def test_put_item(client, admin_headers, auction, queries):
+    with queries() as statements:
+        response = client.put(f"/items/{auction['item_id']}", json={"name": "jar"}, headers=admin_headers)
+    assert response.status_code == 200
+    # Renombrar marca como cambiadas las subastas del articulo
+    assert len(statements) == 7
+
+def test_post_auction(client, admin_headers, auction, queries):
+    item = client.post("/items/", json={
+        "name": "lamp", "description": "old lamp", "init_price": 5, "category_id": auction["category_id"]
+    }, headers=admin_headers).json()
+    with queries() as statements:
+        response = client.post("/auctions/", json={
+            "name": "lamp auction", "description": "lamp", "item_id": item["id"],
+            "start_date": "2099-01-01T00:00:00Z", "end_date": "2099-01-02T00:00:00Z"
+        }, headers=admin_headers)
+    assert response.status_code == 200
+    assert len(statements) == 4
+
+def test_put_auction(client, admin_headers, auction, queries):
+    with queries() as statements:
+        response = client.put(f"/auctions/{auction['auction_id']}", json={"name": "renamed"}, headers=admin_headers)
+    assert response.status_code == 200
+    # Renombrar busca las pujas de la subasta (ninguna en este caso)
+    assert len(statements) == 7
+
+def test_post_bid(client, user_headers, auction, queries):
+    with queries() as statements:
+        response = client.post("/bids/", json={"amount": 1, "auction_id": auction["auction_id"]}, headers=user_headers)
+    assert response.status_code == 200
+    assert len(statements) == 6
+
+def test_put_bid(client, admin_headers, user_headers, auction, queries):
+    bid = client.post("/bids/", json={"amount": 1, "auction_id": auction["auction_id"]}, headers=user_headers).json()
+    with queries() as statements:
+        response = client.put(f"/bids/{bid['id']}", json={"amount": 2}, headers=admin_headers)
+    assert response.status_code == 200
+    assert len(statements) == 6
+
+def test_post_user(client, admin_headers, queries):
+    with queries() as statements:
+        response = client.post("/admin/users/", json={"name": "other", "email": "other@test.com", "password": "secret"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert len(statements) == 3
+
+def test_put_user(client, admin_headers, user_headers, queries):
+    user_id = client.get("/admin/users/", headers=admin_headers).json()[-1]["id"]
+    with queries() as statements:
+        response = client.put(f"/admin/users/{user_id}", json={"name": "renamed"}, headers=admin_headers)
+    assert response.status_code == 200
+    # Renombrar busca los articulos ganados y las pujas del usuario (ninguno en este caso)
+    assert len(statements) == 5
+
+def test_register(client, queries):
+    with queries() as statements:
+        response = client.post("/auth/register", json={"name": "new", "email": "new@test.com", "password": "secret"})
+    assert response.status_code == 200
+    assert len(statements) == 1
+
+
+def test_writes_route_reads_to_primary(client, admin_headers, auction):
+    # Toda escritura del usuario marca su token: sus siguientes lecturas van a la primaria
+    from config.db import _recent_writers, wrote_recently
+    token = admin_headers["Authorization"].split(" ")[1]
+    for method, url, body in [
+        ("post", "/admin/categories/", {"name": "lamps"}),
+        ("post", "/items/", {"name": "lamp", "description": "old lamp", "init_price": 5, "category_id": auction["category_id"]}),
+        ("delete", f"/auctions/{auction['auction_id']}", None),
+    ]:
+        _recent_writers.clear()
+        response = client.request(method, url, json=body, headers=admin_headers)
+        assert response.status_code == 200
+        assert wrote_recently(token)